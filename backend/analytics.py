@@ -0,0 +1,113 @@
+"""
+Sales analytics read from the pre-aggregated sales_daily rollups (see rollups.py),
+so dashboard latency does not grow with order history.
+"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from rollups import day_of
+from serialization import naive_utc
+
+# Pending orders count towards revenue so the demo (unpaid) checkout shows up
+REVENUE_STATUSES = ["completed", "pending"]
+DEFAULT_RANGE_DAYS = 30
+MAX_BUCKETS = 30
+TOP_N = 5
+
+def resolve_range(start: Optional[datetime], end: Optional[datetime]) -> Tuple[datetime, datetime]:
+    """Defaults to the last DEFAULT_RANGE_DAYS days; both bounds are naive UTC like created_at."""
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(days=DEFAULT_RANGE_DAYS)
+    return naive_utc(start), naive_utc(end)
+
+def day_range(start: datetime, end: datetime) -> Dict:
+    # Rollups are per day, so the range widens to whole days
+    return {"$gte": day_of(start), "$lte": day_of(end)}
+
+def _counter(field: str) -> Dict:
+    return {"$add": [{"$ifNull": [f"${status}.{field}", 0]} for status in REVENUE_STATUSES]}
+
+BUSINESS_ROWS = {"$match": {"product_code": None}}
+PRODUCT_ROWS = {"$match": {"product_code": {"$ne": None}}}
+
+def rollup_pipeline(match: Dict, granularity: str = "day") -> List[Dict]:
+    """One round trip over sales_daily producing every dashboard panel."""
+    return [
+        {"$match": match},
+        {"$facet": {
+            "dailyRevenue": [
+                BUSINESS_ROWS,
+                {"$group": {"_id": {"$dateTrunc": {"date": "$day", "unit": granularity}}, "revenue": {"$sum": _counter("revenue")}}},
+                {"$match": {"revenue": {"$gt": 0}}},
+                {"$sort": {"_id": -1}},
+                {"$limit": MAX_BUCKETS},
+            ],
+            "topProducts": [
+                PRODUCT_ROWS,
+                {"$group": {"_id": "$product_name", "sales": {"$sum": _counter("units")}}},
+                {"$match": {"sales": {"$gt": 0}}},
+                {"$sort": {"sales": -1, "_id": 1}},
+                {"$limit": TOP_N},
+            ],
+            "topBusinesses": [
+                BUSINESS_ROWS,
+                # $last takes the name from the latest day, so a renamed business shows its current name
+                {"$sort": {"day": 1}},
+                {"$group": {"_id": "$business_id", "name": {"$last": "$business_name"}, "revenue": {"$sum": _counter("revenue")}}},
+                {"$match": {"revenue": {"$gt": 0}}},
+                {"$sort": {"revenue": -1, "_id": 1}},
+                {"$limit": TOP_N},
+            ],
+            "totals": [
+                BUSINESS_ROWS,
+                {"$group": {"_id": None, "revenue": {"$sum": _counter("revenue")}}},
+            ],
+        }},
+    ]
+
+async def _facets(db, match: Dict, granularity: str) -> Dict:
+    rows = await db.sales_daily.aggregate(rollup_pipeline(match, granularity)).to_list(length=1)
+    facets = rows[0] if rows else {}
+    return {
+        "dailyRevenue": [
+            {"date": row["_id"].strftime("%Y-%m-%d"), "revenue": row["revenue"]}
+            for row in reversed(facets.get("dailyRevenue", []))
+        ],
+        "topProducts": [{"name": row["_id"], "sales": row["sales"]} for row in facets.get("topProducts", [])],
+        "topBusinesses": [{"name": row["name"], "revenue": row["revenue"]} for row in facets.get("topBusinesses", [])],
+        "totals": (facets.get("totals") or [{"revenue": 0}])[0],
+    }
+
+async def admin_analytics(db, start: datetime, end: datetime, granularity: str = "day") -> Dict:
+    facets = await _facets(db, {"day": day_range(start, end)}, granularity)
+    return {
+        "dailyRevenue": facets["dailyRevenue"],
+        "topProducts": facets["topProducts"],
+        "topBusinesses": facets["topBusinesses"],
+    }
+
+async def count_orders(db, match: Dict) -> int:
+    """
+    Distinct orders from sales_daily_orders. Summing per-business order
+    counters would count an order from two of the matched businesses twice.
+    """
+    rows = await db.sales_daily_orders.aggregate([
+        {"$match": match},
+        {"$group": {"_id": None, "orders": {"$sum": _counter("orders")}}},
+    ]).to_list(length=1)
+    return int(rows[0]["orders"]) if rows else 0
+
+async def merchant_analytics(db, business_ids: List[str], start: Optional[datetime] = None, end: Optional[datetime] = None, granularity: str = "day") -> Dict:
+    """Totals cover the whole history unless a range is given, like the dashboard always showed."""
+    match: Dict = {"business_id": {"$in": business_ids}}
+    order_match: Dict = {"business_ids": {"$in": business_ids}}
+    if start or end:
+        match["day"] = order_match["day"] = day_range(*resolve_range(start, end))
+    facets, total_orders = await asyncio.gather(_facets(db, match, granularity), count_orders(db, order_match))
+    return {
+        "totalRevenue": facets["totals"]["revenue"],
+        "totalOrders": total_orders,
+        "dailyRevenue": facets["dailyRevenue"],
+        "topProducts": facets["topProducts"],
+    }
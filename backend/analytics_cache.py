@@ -0,0 +1,97 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, FrozenSet, Hashable, Iterable, Optional, Tuple
+
+ANALYTICS_CACHE_TTL = float(os.getenv("ANALYTICS_CACHE_TTL", "30"))
+ANALYTICS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYTICS_CACHE_MAX_ENTRIES", "1000"))
+
+class AnalyticsCache:
+    """
+    Memoizes analytics responses for ttl seconds. Each entry records the
+    business IDs it covers (None for the admin view, which covers all), so
+    an order write only drops the dashboards it can change. Concurrent misses
+    for the same key share one computation.
+    """
+
+    def __init__(self, max_entries: int = ANALYTICS_CACHE_MAX_ENTRIES, ttl: float = ANALYTICS_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Optional[FrozenSet[str]], Dict]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._generation = 0
+
+    async def get_or_compute(self, key: Hashable, business_ids: Optional[Iterable[str]], compute: Callable[[], Awaitable[Dict]]) -> Tuple[Dict, str]:
+        """Returns (result, "hit" | "coalesced" | "miss")."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] >= time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2], "hit"
+        if entry is not None:
+            del self._entries[key]
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending), "coalesced"
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self._generation
+        try:
+            result = await compute()
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an error with no waiters isn't logged as unhandled
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        future.set_result(result)
+        # An order written while computing may not be reflected; don't cache that result
+        if generation == self._generation:
+            scope = frozenset(business_ids) if business_ids is not None else None
+            self._entries[key] = (time.monotonic() + self.ttl, scope, result)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return result, "miss"
+
+    def invalidate(self, business_ids: Iterable[str]):
+        """Drops the admin views and every merchant view covering one of business_ids."""
+        touched = set(business_ids)
+        self._generation += 1
+        for key, (_, scope, _) in list(self._entries.items()):
+            if scope is None or scope & touched:
+                del self._entries[key]
+                self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.coalesced + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
+
+analytics_cache = AnalyticsCache()
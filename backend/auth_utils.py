@@ -1,5 +1,7 @@
 import os
+import asyncio
 import bcrypt
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, Any, Union
 from jose import jwt
@@ -11,6 +13,14 @@ load_dotenv()
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-for-dev-only-change-this-in-prod")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 # 24 hours
+# bcrypt work factor for new hashes; existing hashes are upgraded on login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# bcrypt releases the GIL, so hashing runs in its own thread pool. The
+# semaphore keeps login storms from queueing unbounded work behind it.
+_BCRYPT_CONCURRENCY = os.cpu_count() or 1
+_bcrypt_executor = ThreadPoolExecutor(max_workers=_BCRYPT_CONCURRENCY, thread_name_prefix="bcrypt")
+_bcrypt_semaphore = asyncio.Semaphore(_BCRYPT_CONCURRENCY)
 
 def verify_password(plain_password, hashed_password):
     if isinstance(plain_password, str):
@@ -22,11 +32,43 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     if isinstance(password, str):
         password = password.encode('utf-8')
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     return bcrypt.hashpw(password, salt).decode('utf-8')
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+def password_needs_rehash(hashed_password) -> bool:
+    """True when a stored hash was made with a different work factor than BCRYPT_ROUNDS."""
+    if isinstance(hashed_password, bytes):
+        hashed_password = hashed_password.decode('utf-8')
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+async def _run_bcrypt(func, *args):
+    async with _bcrypt_semaphore:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_bcrypt_executor, func, *args)
+
+async def verify_password_async(plain_password, hashed_password) -> bool:
+    """verify_password without blocking the event loop."""
+    return await _run_bcrypt(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password) -> str:
+    """get_password_hash without blocking the event loop."""
+    return await _run_bcrypt(get_password_hash, password)
+
+def role_claims(user: dict) -> dict:
+    """Role claims embedded in access tokens so authorization needs no user lookup."""
+    return {
+        "is_admin": bool(user.get("is_admin")),
+        "is_merchant": bool(user.get("is_merchant")),
+        "ver": user.get("token_version", 0),
+    }
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None, user: Optional[dict] = None):
     to_encode = data.copy()
+    if user is not None:
+        to_encode.update(role_claims(user))
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
@@ -0,0 +1,111 @@
+"""
+Compares the original Python-loop admin analytics with the columnar
+OrderSnapshot on synthetic order histories.
+
+    python bench_analytics.py                 # 10k, 100k and 1M orders
+    python bench_analytics.py 10000 50000
+"""
+import gc
+import sys
+import time
+import random
+import tempfile
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from order_columns import OrderSnapshot
+
+BUSINESSES = [(f"business-{b}", f"Business {b}", random.choice(["Wellness", "Beauty", "Fashion", "Groceries"])) for b in range(200)]
+PRODUCTS = [(f"B{b}P{p}", f"Product {b}-{p}", random.randint(5, 500) * 100) for b in range(200) for p in range(50)]
+CATEGORIES = {slug: category for slug, _, category in BUSINESSES}
+
+def make_orders(count: int, years: int = 3):
+    rng = random.Random(count)
+    start = datetime.utcnow() - timedelta(days=365 * years)
+    span = 365 * years * 86400
+    customers = max(count // 5, 1)
+    orders = []
+    for i in range(count):
+        items = []
+        for _ in range(rng.randint(1, 3)):
+            index = rng.randrange(len(PRODUCTS))
+            code, name, price = PRODUCTS[index]
+            slug, business_name, _ = BUSINESSES[index // 50]
+            items.append({
+                "code": code, "name": name, "price": price, "quantity": rng.randint(1, 4),
+                "business_id": slug, "business_name": business_name, "business_slug": slug,
+            })
+        orders.append({
+            "created_at": start + timedelta(seconds=rng.randrange(span)),
+            "customer_email": f"customer{rng.randrange(customers)}@example.com",
+            "status": rng.choice(["completed", "completed", "pending", "failed"]),
+            "total_amount": sum(item["price"] * item["quantity"] for item in items),
+            "items": items,
+        })
+    return orders
+
+def loop_analytics(orders):
+    # The previous get_admin_analytics body, kept here for comparison
+    daily_revenue_map = defaultdict(float)
+    product_sales = defaultdict(int)
+    business_sales = defaultdict(float)
+    for order in orders:
+        if order.get("status") not in ["completed", "pending"]:
+            continue
+        date_str = order.get("created_at", datetime.utcnow()).strftime("%m/%d")
+        daily_revenue_map[date_str] += order.get("total_amount", 0)
+        for item in order.get("items", []):
+            prod_name = item.get("name")
+            biz_name = item.get("business_name")
+            qty = item.get("quantity", 1)
+            product_sales[prod_name] += qty
+            business_sales[biz_name] += (item.get("price", 0) * qty)
+    daily_revenue = [{"date": k, "revenue": v} for k, v in sorted(daily_revenue_map.items())[-30:]]
+    top_products = [{"name": k, "sales": v} for k, v in sorted(product_sales.items(), key=lambda x: x[1], reverse=True)[:5]]
+    top_businesses = [{"name": k, "revenue": v} for k, v in sorted(business_sales.items(), key=lambda x: x[1], reverse=True)[:5]]
+    return {"dailyRevenue": daily_revenue, "topProducts": top_products, "topBusinesses": top_businesses}
+
+def columnar_analytics(snapshot: OrderSnapshot):
+    return {
+        "dailyRevenue": snapshot.revenue_by_period("day")[-30:],
+        "topProducts": snapshot.top_k("product", 5, "units"),
+        "topBusinesses": snapshot.top_k("business", 5, "revenue"),
+    }
+
+def timed(fn, *args, runs: int = 3):
+    best, result = float("inf"), None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+def run(count: int):
+    orders = make_orders(count)
+    loop_ms, loop_result = timed(loop_analytics, orders, runs=1 if count >= 1_000_000 else 3)
+    build_ms, snapshot = timed(OrderSnapshot.build, orders, CATEGORIES, runs=1)
+    del orders
+    gc.collect()
+
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot.save(directory)
+        load_ms, mapped = timed(OrderSnapshot.load, directory)
+        query_ms, columnar_result = timed(columnar_analytics, mapped)
+        weekly_ms, _ = timed(mapped.revenue_by_period, "week", "category")
+        rolling_ms, _ = timed(mapped.rolling_revenue, 7)
+        cohort_ms, _ = timed(mapped.cohort_revenue, "month")
+        del mapped
+
+    # Both implementations must agree on the rankings
+    assert [p["sales"] for p in loop_result["topProducts"]] == [p["units"] for p in columnar_result["topProducts"]]
+    assert [round(b["revenue"]) for b in loop_result["topBusinesses"]] == [round(b["revenue"]) for b in columnar_result["topBusinesses"]]
+
+    print(f"{count:>9,} orders  loop {loop_ms:9.1f} ms   columnar {query_ms:7.1f} ms ({loop_ms / query_ms:5.0f}x)"
+          f"   weekly x category {weekly_ms:6.1f} ms   rolling 7d {rolling_ms:5.1f} ms   cohorts {cohort_ms:6.1f} ms"
+          f"   [build {build_ms / 1000:.1f} s, mmap load {load_ms:.1f} ms]")
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    for size in sizes:
+        run(size)
+        gc.collect()
@@ -0,0 +1,68 @@
+"""
+Measures /payments/initialize throughput against a running API.
+Start fake_paystack.py and point the API at it first (see fake_paystack.py).
+
+    python bench_checkout.py --requests 500 --concurrency 50
+"""
+import time
+import asyncio
+import argparse
+import statistics
+
+import httpx
+
+async def pick_item(client: httpx.AsyncClient) -> dict:
+    """A real catalog product, priced through /cart/quote so checkouts pass repricing."""
+    response = await client.get("/businesses", params={"limit": 20})
+    response.raise_for_status()
+    for business in response.json():
+        for product in business.get("products", []):
+            item = {"code": product["code"], "quantity": 1, "business_slug": business["slug"]}
+            quote = (await client.post("/cart/quote", json={"items": [item]})).json()
+            if quote["items"]:
+                line = quote["items"][0]
+                return {
+                    "code": line["code"], "name": line["name"], "price": line["price"], "quantity": 1,
+                    "business_name": line["business_name"], "business_slug": line["business_slug"], "business_id": line["business_id"],
+                }
+    raise SystemExit("No purchasable products found; seed the catalog first (seed_db.py)")
+
+async def run(base_url: str, total: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    statuses = {}
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        item = await pick_item(client)
+        print(f"Checking out {item['business_slug']}/{item['code']} at {item['price']}")
+
+        async def checkout(i: int):
+            payload = {
+                "customer_name": f"Load Tester {i}",
+                "customer_email": f"load{i}@example.com",
+                "customer_phone": "08000000000",
+                "items": [item],
+                "total_amount": item["price"],
+            }
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post("/payments/initialize", json=payload)
+                latencies.append(time.perf_counter() - start)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(checkout(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"{total} checkouts in {elapsed:.2f}s -> {total / elapsed:.1f} req/s")
+    print(f"latency p50 {statistics.median(latencies) * 1000:.0f} ms, p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f} ms")
+    print(f"status codes: {statuses}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Checkout load generator")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url, args.requests, args.concurrency))
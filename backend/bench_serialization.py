@@ -0,0 +1,81 @@
+"""
+Compares the old response path (recursive sanitize_mongo_obj + FastAPI's
+jsonable_encoder + json.dumps) with to_public + orjson on a 10k-product catalog.
+
+    python bench_serialization.py
+"""
+import copy
+import json
+import time
+import random
+from datetime import datetime
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from serialization import dumps, to_public_list
+
+def sanitize_mongo_obj(obj):
+    # Previous implementation, kept here for comparison
+    if not obj:
+        return obj
+    if isinstance(obj, list):
+        return [sanitize_mongo_obj(i) for i in obj]
+    if isinstance(obj, dict):
+        new_obj = obj.copy()
+        if "_id" in new_obj:
+            new_obj["id"] = str(new_obj["_id"])
+            del new_obj["_id"]
+        for key, value in new_obj.items():
+            new_obj[key] = sanitize_mongo_obj(value)
+        return new_obj
+    return obj
+
+def make_catalog(businesses=100, products_per_business=100):
+    catalog = []
+    for b in range(businesses):
+        catalog.append({
+            "_id": ObjectId(),
+            "name": f"Business {b}",
+            "slug": f"business-{b}",
+            "category": random.choice(["Wellness", "Beauty", "Fashion", "Groceries"]),
+            "description": "Premium products sourced locally and delivered fast. " * 3,
+            "hero_image": "https://images.unsplash.com/photo-1542736705-53f0131d1e98?auto=format&fit=crop&q=80&w=1200",
+            "logo": "https://images.unsplash.com/photo-1564890369478-c89ca6d9cde9?auto=format&fit=crop&q=80&w=200",
+            "is_approved": True,
+            "created_at": datetime.utcnow(),
+            "products": [{
+                "code": f"B{b}P{p}",
+                "whatsapp_id": str(random.randint(10**9, 10**10)),
+                "name": f"Product {p}",
+                "price": random.randint(500, 50000),
+                "description": "A customer favourite, packed fresh for every order.",
+                "image": "https://images.unsplash.com/photo-1587049352846-4a222e784d38?auto=format&fit=crop&q=80&w=800",
+                "featured": p % 10 == 0,
+            } for p in range(products_per_business)],
+        })
+    return catalog
+
+def bench(label, fn, catalog, runs=10):
+    timings = []
+    for _ in range(runs):
+        docs = copy.deepcopy(catalog)
+        start = time.perf_counter()
+        body = fn(docs)
+        timings.append(time.perf_counter() - start)
+    best = min(timings) * 1000
+    print(f"{label:<40} {best:8.1f} ms  ({len(body) / 1024:.0f} KiB)")
+    return best
+
+def old_path(docs):
+    return json.dumps(jsonable_encoder(sanitize_mongo_obj(docs))).encode("utf-8")
+
+def new_path(docs):
+    return dumps(to_public_list(docs))
+
+if __name__ == "__main__":
+    catalog = make_catalog()
+    print(f"{len(catalog)} businesses, {sum(len(b['products']) for b in catalog)} products\n")
+    old = bench("sanitize_mongo_obj + jsonable_encoder", old_path, catalog)
+    new = bench("to_public + orjson", new_path, catalog)
+    print(f"\nSpeedup: {old / new:.1f}x")
@@ -0,0 +1,268 @@
+import os
+import time
+import asyncio
+import hashlib
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+from bson import ObjectId
+
+from serialization import dumps
+from compression import compress
+
+# How long a snapshot is trusted when no change stream is keeping it current.
+# Writes made through this process patch the snapshot immediately; this only
+# bounds staleness for writes made by other workers or scripts.
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "60"))
+CATALOG_CHANGE_STREAM = os.getenv("CATALOG_CHANGE_STREAM", "false").lower() in ("1", "true", "yes")
+
+# Upper bound on precompressed responses kept per snapshot version
+MAX_ENCODED_RESPONSES = 256
+
+# Card-sized view used by the storefront listing pages (no embedded products)
+SUMMARY_FIELDS = ["name", "slug", "category", "description", "whatsapp_link", "hero_image", "logo", "featured"]
+
+def digest(*parts) -> str:
+    """Short content hash used for strong ETags."""
+    h = hashlib.blake2b(digest_size=12)
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+def sort_key(business_id) -> Tuple[int, str]:
+    """Mirrors BSON ordering of _id values: strings sort before ObjectIds."""
+    if isinstance(business_id, ObjectId):
+        return (1, str(business_id))
+    return (0, str(business_id))
+
+def cursor_key(after: str) -> Tuple[int, str]:
+    return (1, after) if ObjectId.is_valid(after) else (0, after)
+
+def is_approved(business: Dict) -> bool:
+    # Documents from before approval existed have no is_approved field and count as approved
+    return business.get("is_approved") is not False
+
+def is_addressable(business: Dict) -> bool:
+    """
+    Whether carts and the Sync Station can refer to the business, which needs
+    a slug and a name. Indexes skip other documents instead of failing a rebuild.
+    """
+    return bool(business.get("slug")) and bool(business.get("name"))
+
+def to_public(business: Dict) -> Dict:
+    public = {k: v for k, v in business.items() if k != "_id"}
+    public["id"] = str(business["_id"])
+    return public
+
+class CachedBusiness:
+    """A business snapshot entry with its JSON bytes prebuilt."""
+    __slots__ = ("key", "doc", "full", "summary", "etag")
+
+    def __init__(self, business: Dict):
+        self.key = sort_key(business["_id"])
+        self.doc = to_public(business)
+        self.full = dumps(self.doc)
+        summary = {"id": self.doc["id"]}
+        summary.update({f: self.doc[f] for f in SUMMARY_FIELDS if f in self.doc})
+        self.summary = dumps(summary)
+        self.etag = digest(self.full)
+
+    @property
+    def approved(self) -> bool:
+        return is_approved(self.doc)
+
+class CatalogCache:
+    """
+    Versioned in-memory snapshot of the businesses collection. Reads are served
+    from memory; writes patch single entries and bump the version. Derived views
+    (e.g. the search index) are attached as listeners and kept in step.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.loaded = False
+        self.loaded_at = 0.0
+        self.watching = False
+        self.digest = ""
+        self._entries: Dict[str, CachedBusiness] = {}
+        self._approved: List[CachedBusiness] = []
+        self._approved_keys: List[Tuple[int, str]] = []
+        self._by_slug: Dict[str, CachedBusiness] = {}
+        self._listeners = []
+        self._encoded: Dict[tuple, bytes] = {}
+        self._lock = asyncio.Lock()
+        self._reload_task = None
+        self._warm_task = None
+        # One write log per reload in flight: business_id -> latest document, or None if removed
+        self._write_logs: List[Dict[str, Optional[Dict]]] = []
+
+    def attach(self, listener):
+        """Registers a view exposing rebuild(), index_business() and remove_business()."""
+        self._listeners.append(listener)
+
+    async def ensure_loaded(self, db):
+        """Loads the snapshot on first use and refreshes it in the background once stale."""
+        if not self.loaded:
+            async with self._lock:
+                if not self.loaded:
+                    await self.reload(db)
+            return
+        if not self.watching and time.monotonic() - self.loaded_at > CATALOG_CACHE_TTL:
+            if self._reload_task is None or self._reload_task.done():
+                self._reload_task = asyncio.create_task(self.reload(db))
+
+    def warm(self, db) -> asyncio.Task:
+        """
+        Starts the first load in the background, or returns the one already
+        running. Startup and cold requests share this task so neither waits on
+        MongoDB; failures are logged and the next call tries again.
+        """
+        if self._warm_task is None or (self._warm_task.done() and not self.loaded):
+            self._warm_task = asyncio.create_task(self._warm(db))
+        return self._warm_task
+
+    async def _warm(self, db):
+        try:
+            await self.ensure_loaded(db)
+        except Exception as e:
+            print(f"WARNING: Could not warm catalog cache: {e}")
+
+    async def reload(self, db):
+        # Writes applied while the fetch is in flight are newer than (or as new as)
+        # what it returns, so they are replayed over the result before the swap
+        writes: Dict[str, Optional[Dict]] = {}
+        self._write_logs.append(writes)
+        try:
+            businesses = await db.businesses.find().to_list(length=None)
+        except Exception as e:
+            if not self.loaded:
+                raise
+            print(f"WARNING: Catalog reload failed, serving previous snapshot: {e}")
+            self.loaded_at = time.monotonic()
+            return
+        finally:
+            self._write_logs.remove(writes)
+        if writes:
+            by_id = {str(b["_id"]): b for b in businesses}
+            for business_id, business in writes.items():
+                if business is None:
+                    by_id.pop(business_id, None)
+                else:
+                    by_id[business_id] = business
+            businesses = list(by_id.values())
+        self._entries = {str(b["_id"]): CachedBusiness(b) for b in businesses}
+        self._rebuild_views()
+        for listener in self._listeners:
+            listener.rebuild(businesses)
+        self.loaded = True
+        self.loaded_at = time.monotonic()
+        self.version += 1
+
+    async def refresh(self, db, business_id: str):
+        """Re-reads one business after a write and patches the snapshot."""
+        if not self.loaded:
+            return
+        business = await db.businesses.find_one({"_id": business_id})
+        if business:
+            self.apply(business)
+        else:
+            self.remove(business_id)
+
+    def apply(self, business: Dict):
+        for writes in self._write_logs:
+            writes[str(business["_id"])] = business
+        self._entries[str(business["_id"])] = CachedBusiness(business)
+        self._rebuild_views()
+        for listener in self._listeners:
+            listener.index_business(business)
+        self.version += 1
+
+    def remove(self, business_id):
+        for writes in self._write_logs:
+            writes[str(business_id)] = None
+        if self._entries.pop(str(business_id), None) is None:
+            return
+        self._rebuild_views()
+        for listener in self._listeners:
+            listener.remove_business(str(business_id))
+        self.version += 1
+
+    def _rebuild_views(self):
+        approved = sorted((e for e in self._entries.values() if e.approved), key=lambda e: e.key)
+        self._approved = approved
+        self._approved_keys = [e.key for e in approved]
+        self._by_slug = {e.doc.get("slug"): e for e in self._entries.values() if e.doc.get("slug")}
+        self._encoded = {}
+        # Content hash of the whole snapshot; identical across workers holding the same data
+        self.digest = digest(*(e.etag for e in sorted(self._entries.values(), key=lambda e: e.key)))
+
+    def page(self, after: Optional[str] = None, limit: int = 100, category: Optional[str] = None) -> Tuple[List[CachedBusiness], Optional[str]]:
+        """Returns one keyset page of approved businesses and the next cursor."""
+        start = bisect_right(self._approved_keys, cursor_key(after)) if after else 0
+        page = []
+        for entry in self._approved[start:]:
+            if category and entry.doc.get("category") != category:
+                continue
+            if len(page) == limit:
+                return page, page[-1].doc["id"]
+            page.append(entry)
+        return page, None
+
+    def encoded(self, key, encoding: Optional[str], build) -> bytes:
+        """
+        Returns a response body built by build(), compressed with encoding.
+        Results are kept until the snapshot changes so hot listings are
+        not recompressed on every request.
+        """
+        cache_key = (key, encoding)
+        body = self._encoded.get(cache_key)
+        if body is None:
+            body = build()
+            if encoding:
+                body = compress(body, encoding)
+            if len(self._encoded) >= MAX_ENCODED_RESPONSES:
+                self._encoded.clear()
+            self._encoded[cache_key] = body
+        return body
+
+    def get(self, business_id: str) -> Optional[CachedBusiness]:
+        return self._entries.get(str(business_id))
+
+    def get_by_slug(self, slug: str) -> Optional[CachedBusiness]:
+        return self._by_slug.get(slug)
+
+    def owned_by(self, email: str) -> List[CachedBusiness]:
+        return sorted((e for e in self._entries.values() if e.doc.get("owner_email") == email), key=lambda e: e.key)
+
+    def all(self) -> List[CachedBusiness]:
+        return list(self._entries.values())
+
+    async def watch(self, db):
+        """
+        Applies writes made outside this process (other workers, reseed.py)
+        using a MongoDB change stream. Requires a replica set or Atlas.
+        """
+        try:
+            async with db.businesses.watch(full_document="updateLookup") as stream:
+                self.watching = True
+                await self.reload(db)
+                async for change in stream:
+                    operation = change.get("operationType")
+                    if operation in ("insert", "update", "replace") and change.get("fullDocument"):
+                        self.apply(change["fullDocument"])
+                    elif operation == "delete":
+                        self.remove(change["documentKey"]["_id"])
+                    elif operation in ("drop", "invalidate", "dropDatabase", "rename"):
+                        await self.reload(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"WARNING: Catalog change stream stopped, falling back to TTL refresh: {e}")
+        finally:
+            self.watching = False
+
+def join(entries: List[CachedBusiness], view: str = "full") -> bytes:
+    """Assembles a JSON array from prebuilt per-business bytes."""
+    return b"[" + b",".join(getattr(e, view) for e in entries) + b"]"
+
+catalog_cache = CatalogCache()
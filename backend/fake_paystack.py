@@ -0,0 +1,63 @@
+"""
+Local stand-in for the Paystack API, for tests and checkout load runs.
+
+    uvicorn fake_paystack:app --port 8001
+    PAYSTACK_API_URL=http://localhost:8001 PAYSTACK_SECRET_KEY=sk_test_fake uvicorn main:app
+
+FAKE_PAYSTACK_LATENCY_MS adds a delay to every call and
+FAKE_PAYSTACK_FAILURE_RATE (0-1) makes that share of calls return 503,
+so timeouts, retries and the circuit breaker can be exercised offline.
+/stats counts calls per endpoint.
+"""
+import os
+import random
+import asyncio
+import uuid
+
+from fastapi import FastAPI, Header, HTTPException, Request
+
+from fake_servers import add_stats_endpoints
+
+LATENCY_MS = float(os.getenv("FAKE_PAYSTACK_LATENCY_MS", "50"))
+FAILURE_RATE = float(os.getenv("FAKE_PAYSTACK_FAILURE_RATE", "0"))
+
+app = FastAPI(title="Fake Paystack")
+transactions = {}
+stats = {"initialize": 0, "verify": 0}
+add_stats_endpoints(app, stats)
+
+async def simulate(authorization):
+    if not authorization or not authorization.startswith("Bearer sk_"):
+        raise HTTPException(status_code=401, detail={"status": False, "message": "Invalid key"})
+    await asyncio.sleep(LATENCY_MS / 1000)
+    if random.random() < FAILURE_RATE:
+        raise HTTPException(status_code=503, detail={"status": False, "message": "Service unavailable"})
+
+@app.post("/transaction/initialize")
+async def initialize(request: Request, authorization: str = Header(None)):
+    stats["initialize"] += 1
+    await simulate(authorization)
+    payload = await request.json()
+    reference = payload.get("reference") or uuid.uuid4().hex
+    if reference in transactions:
+        raise HTTPException(status_code=400, detail={"status": False, "message": "Duplicate Transaction Reference"})
+    access_code = uuid.uuid4().hex[:15]
+    transactions[reference] = {"reference": reference, "amount": payload.get("amount"), "email": payload.get("email"), "status": "abandoned"}
+    return {
+        "status": True,
+        "message": "Authorization URL created",
+        "data": {
+            "authorization_url": f"https://checkout.paystack.com/{access_code}",
+            "access_code": access_code,
+            "reference": reference,
+        },
+    }
+
+@app.get("/transaction/verify/{reference}")
+async def verify(reference: str, authorization: str = Header(None)):
+    stats["verify"] += 1
+    await simulate(authorization)
+    transaction = transactions.get(reference)
+    if transaction is None:
+        raise HTTPException(status_code=404, detail={"status": False, "message": "Transaction reference not found"})
+    return {"status": True, "message": "Verification successful", "data": transaction}
@@ -0,0 +1,35 @@
+"""
+Shared plumbing for the local API stand-ins (fake_paystack.py,
+fake_whatsapp.py) and the script tests that run them.
+"""
+import time
+import socket
+import threading
+from typing import Dict
+
+import uvicorn
+from fastapi import FastAPI
+
+def add_stats_endpoints(app: FastAPI, stats: Dict[str, int]):
+    """GET /stats reports the counters; POST /stats/reset zeroes them."""
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        stats.update(dict.fromkeys(stats, 0))
+        return stats
+
+def serve_in_thread(app: FastAPI, port: int) -> uvicorn.Server:
+    """Starts app on 127.0.0.1:port in a daemon thread and waits until it accepts connections."""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    for _ in range(50):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{app.title} did not start on port {port}")
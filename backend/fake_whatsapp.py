@@ -0,0 +1,61 @@
+"""
+Local stand-in for wa.me product pages, for scraper tests.
+
+    uvicorn fake_whatsapp:app --port 8002
+    WHATSAPP_BASE_URL=http://localhost:8002 uvicorn main:app
+
+/p/{product_id} serves an OG-tagged <head> immediately and then trickles a
+large body, so a scraper that reads past </head> is easy to spot. IDs
+starting with "missing" return 404. FAKE_WHATSAPP_LATENCY_MS delays the
+head; /stats reports peak concurrent requests.
+"""
+import os
+import asyncio
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+
+from fake_servers import add_stats_endpoints
+
+LATENCY_MS = float(os.getenv("FAKE_WHATSAPP_LATENCY_MS", "100"))
+BODY_CHUNKS = 50
+BODY_CHUNK_DELAY = 0.2
+
+app = FastAPI(title="Fake WhatsApp")
+stats = {"active": 0, "peak": 0, "requests": 0, "body_chunks_sent": 0}
+add_stats_endpoints(app, stats)
+
+def head(product_id: str) -> str:
+    return (
+        "<!DOCTYPE html><html><head>"
+        f'<meta property="og:title" content="Shea Butter {product_id[-4:]} from Apinke Herbs on WhatsApp" />'
+        '<meta property="og:description" content="Raw unrefined shea butter · NGN 4,500" />'
+        '<meta property="og:image" content="https://example.com/shea.jpg" />'
+        "<title>WhatsApp</title></head>"
+    )
+
+@app.get("/p/{product_id}")
+async def product_page(product_id: str):
+    if product_id.startswith("missing"):
+        raise HTTPException(status_code=404)
+    stats["requests"] += 1
+
+    async def page():
+        stats["active"] += 1
+        stats["peak"] = max(stats["peak"], stats["active"])
+        try:
+            await asyncio.sleep(LATENCY_MS / 1000)
+            yield head(product_id).encode()
+            for _ in range(BODY_CHUNKS):
+                await asyncio.sleep(BODY_CHUNK_DELAY)
+                stats["body_chunks_sent"] += 1
+                yield b"<div>" + b"x" * 4096 + b"</div>"
+            yield b"</body></html>"
+        finally:
+            stats["active"] -= 1
+
+    return StreamingResponse(page(), media_type="text/html; charset=utf-8")
+
+@app.get("/p/{product_id}/{phone}")
+async def product_page_with_phone(product_id: str, phone: str):
+    return await product_page(product_id)
@@ -0,0 +1,130 @@
+"""
+Index manifest for every collection, applied idempotently at startup.
+
+Run directly to manage indexes from the command line:
+    python indexes.py            # create any missing indexes
+    python indexes.py --check    # explain() each query shape, fail on COLLSCAN
+"""
+import sys
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import ConnectionFailure
+
+# collection -> [(keys, options)]
+INDEX_MANIFEST: Dict[str, List[Tuple[list, dict]]] = {
+    "users": [
+        ([("email", ASCENDING)], {"name": "email_unique", "unique": True}),
+    ],
+    "businesses": [
+        ([("slug", ASCENDING)], {"name": "slug_unique", "unique": True}),
+        ([("owner_email", ASCENDING)], {"name": "owner_email"}),
+        ([("products.code", ASCENDING)], {"name": "products_code"}),
+        ([("products.whatsapp_id", ASCENDING)], {"name": "products_whatsapp_id"}),
+        ([("is_approved", ASCENDING), ("_id", ASCENDING)], {"name": "approved_id"}),
+        ([("category", ASCENDING), ("is_approved", ASCENDING), ("_id", ASCENDING)], {"name": "category_approved_id"}),
+    ],
+    "orders": [
+        # Listing indexes: optional equality prefix, then the (created_at, _id) keyset sort
+        ([("created_at", DESCENDING), ("_id", DESCENDING)], {"name": "created_at_id"}),
+        ([("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], {"name": "status_created_at_id"}),
+        ([("customer_email", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], {"name": "customer_email_created_at_id"}),
+        ([("customer_phone", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], {"name": "customer_phone_created_at_id"}),
+        # Multikey: one entry per business an order bought from
+        ([("business_ids", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], {"name": "business_ids_created_at_id"}),
+    ],
+    "sales_daily": [
+        ([("day", ASCENDING), ("business_id", ASCENDING), ("product_code", ASCENDING)], {"name": "day_business_product_unique", "unique": True}),
+        ([("business_id", ASCENDING), ("day", ASCENDING)], {"name": "business_day"}),
+    ],
+    "sales_daily_orders": [
+        ([("day", ASCENDING), ("basket", ASCENDING)], {"name": "day_basket_unique", "unique": True}),
+        # Multikey: one entry per business in the basket
+        ([("business_ids", ASCENDING), ("day", ASCENDING)], {"name": "business_ids_day"}),
+    ],
+    "webhook_events": [
+        ([("processed", ASCENDING), ("received_at", ASCENDING)], {"name": "processed_received_at"}),
+    ],
+    "scrape_cache": [
+        # TTL index: Mongo deletes each entry once expires_at has passed
+        ([("expires_at", ASCENDING)], {"name": "expires_at_ttl", "expireAfterSeconds": 0}),
+    ],
+}
+
+ORDER_SORT = [("created_at", DESCENDING), ("_id", DESCENDING)]
+
+# Filtered query shapes issued by main.py: (label, collection, filter, sort).
+# Unfiltered reads such as the catalog snapshot load scan on purpose and are not listed.
+QUERY_SHAPES = [
+    ("get_current_user / login", "users", {"email": "user@example.com"}, None),
+    ("my-businesses / merchant lookups", "businesses", {"owner_email": "user@example.com"}, None),
+    ("storefront by slug", "businesses", {"slug": "example-store", "is_approved": {"$ne": False}}, None),
+    ("product by code", "businesses", {"products.code": "CODE001"}, None),
+    ("product by WhatsApp ID", "businesses", {"products.whatsapp_id": "1234567890"}, None),
+    ("business listing", "businesses", {"is_approved": {"$ne": False}}, [("_id", ASCENDING)]),
+    ("business listing by category", "businesses", {"category": "Wellness", "is_approved": {"$ne": False}}, [("_id", ASCENDING)]),
+    ("merchant orders", "orders", {"business_ids": {"$in": ["example-store"]}}, [("created_at", DESCENDING)]),
+    ("admin orders", "orders", {}, ORDER_SORT),
+    ("admin orders by status", "orders", {"status": "pending", "created_at": {"$gte": datetime(2024, 1, 1)}}, ORDER_SORT),
+    ("admin orders by customer email", "orders", {"customer_email": "user@example.com"}, ORDER_SORT),
+    ("admin orders by customer phone", "orders", {"customer_phone": "08000000000"}, ORDER_SORT),
+    ("admin orders by business", "orders", {"business_ids": "example-store"}, ORDER_SORT),
+    ("pending webhook events", "webhook_events", {"processed": False}, [("received_at", ASCENDING)]),
+    ("admin analytics", "sales_daily", {"day": {"$gte": datetime(2024, 1, 1), "$lte": datetime(2024, 1, 31)}}, None),
+    ("merchant analytics", "sales_daily", {"business_id": {"$in": ["example-store"]}}, None),
+    ("merchant order count", "sales_daily_orders", {"business_ids": {"$in": ["example-store"]}}, None),
+]
+
+async def apply_indexes(db):
+    """Creates every index in the manifest. Existing indexes are left untouched."""
+    for collection, indexes in INDEX_MANIFEST.items():
+        for keys, options in indexes:
+            try:
+                await db[collection].create_index(keys, **options)
+            except ConnectionFailure as e:
+                # Every remaining call would wait out the same server-selection timeout
+                print(f"WARNING: Could not reach MongoDB, skipping remaining indexes: {e}")
+                return
+            except Exception as e:
+                print(f"WARNING: Could not create index {collection}.{options['name']}: {e}")
+
+def _stages(plan) -> List[str]:
+    """Collects every stage name in an explain() plan tree."""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(_stages(value))
+    return stages
+
+async def check_query_plans(db) -> bool:
+    """Prints the winning plan of each query shape. Returns False if any does a COLLSCAN."""
+    ok = True
+    for label, collection, query, sort in QUERY_SHAPES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explained = await cursor.explain()
+        stages = _stages(explained.get("queryPlanner", {}).get("winningPlan", {}))
+        scanned = "COLLSCAN" in stages
+        ok = ok and not scanned
+        print(f"{'FAIL' if scanned else 'ok  '} {collection:<11} {label:<36} {' <- '.join(stages)}")
+    return ok
+
+async def main(check: bool):
+    from database import get_database
+    db = get_database()
+    await apply_indexes(db)
+    if check and not await check_query_plans(db):
+        print("\nOne or more query shapes use a collection scan.")
+        sys.exit(1)
+    print("Indexes are in place.")
+
+if __name__ == "__main__":
+    asyncio.run(main(check="--check" in sys.argv))
@@ -1,29 +1,66 @@
-from fastapi import FastAPI, HTTPException, Request, Depends, UploadFile, File, status
+from fastapi import FastAPI, HTTPException, Request, Depends, UploadFile, File, Query, status
 from fastapi.staticfiles import StaticFiles
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 import uvicorn
 import shutil
 import uuid
 import auth_utils
+import paystack_client
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
-import requests
+from typing import List, Dict, Any, Optional, Literal
 import json
 import os
-import time
 from datetime import datetime
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
+import asyncio
 import data_manager
+import analytics
+import indexes
 import models
+import order_ids
+import order_queries
+import order_export
+import rollups
 from database import get_database
+from search_index import catalog_index
+from product_index import product_index, normalize_whatsapp_id
+from price_index import price_index, synced_entry
+from user_cache import user_cache
+from analytics_cache import analytics_cache
+from scrape_cache import scrape_cache
+from token_versions import token_versions
+from webhook_queue import webhook_queue, verify_signature
+from whatsapp_scraper import whatsapp_scraper
+from compression import CompressionMiddleware, choose_encoding
+from serialization import ORJSONResponse, to_public, to_public_list
+from catalog_cache import catalog_cache, SUMMARY_FIELDS, CATALOG_CHANGE_STREAM, digest, join as join_businesses
 
 # Load environment variables from .env file
 load_dotenv()
 
-app = FastAPI(title="Nee Commerce API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    db = get_database()
+    # Index builds and the catalog load run in the background so the app
+    # accepts connections (and /ping answers) while MongoDB is slow or down
+    index_builder = asyncio.create_task(indexes.apply_indexes(db))
+    catalog_warmer = catalog_cache.warm(db)
+    watcher = asyncio.create_task(catalog_cache.watch(db)) if CATALOG_CHANGE_STREAM else None
+    webhook_worker = asyncio.create_task(webhook_queue.run(db))
+    yield
+    index_builder.cancel()
+    catalog_warmer.cancel()
+    webhook_worker.cancel()
+    if watcher:
+        watcher.cancel()
+    await paystack_client.paystack.aclose()
+    await whatsapp_scraper.aclose()
+
+app = FastAPI(title="Nee Commerce API", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -52,27 +89,61 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-Cache", "Age", "X-Scraped-At"],
 )
+app.add_middleware(CompressionMiddleware)
 
 # Paystack Config
 PAYSTACK_SECRET_KEY = os.getenv("PAYSTACK_SECRET_KEY", "sk_test_placeholder")
-PAYSTACK_API_URL = "https://api.paystack.co"
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5173")
 
-def sanitize_mongo_obj(obj):
-    if not obj:
-        return obj
-    if isinstance(obj, list):
-        return [sanitize_mongo_obj(i) for i in obj]
-    if isinstance(obj, dict):
-        new_obj = obj.copy()
-        if "_id" in new_obj:
-            new_obj["id"] = str(new_obj["_id"])
-            del new_obj["_id"]
-        for key, value in new_obj.items():
-            new_obj[key] = sanitize_mongo_obj(value)
-        return new_obj
-    return obj
+# Public business fields a listing can project with ?fields=
+BUSINESS_LISTING_FIELDS = {"name", "slug", "category", "description", "whatsapp_link", "hero_image", "logo", "featured", "products"}
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Turns a ?fields= value into a list of fields (None means every field)."""
+    if not fields:
+        return None
+    if fields == "summary":
+        return SUMMARY_FIELDS
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in BUSINESS_LISTING_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+# Public catalog responses may be reused briefly by browsers and the CDN, then revalidated by ETag
+PUBLIC_CACHE_CONTROL = "public, max-age=30, stale-while-revalidate=300"
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Checks an If-None-Match header against a strong ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in (t.strip().removeprefix("W/") for t in header.split(","))
+
+def negotiated_encoding(request: Request) -> Optional[str]:
+    """
+    The content coding CompressionMiddleware will apply. Strong ETags must
+    differ between the identity and compressed bodies, so it goes into the digest.
+    """
+    return choose_encoding(request.headers.get("accept-encoding", ""))
+
+def conditional_headers(etag: str, cache_control: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+
+# Derived views are patched together with the catalog snapshot
+catalog_cache.attach(catalog_index)
+catalog_cache.attach(product_index)
+catalog_cache.attach(price_index)
+webhook_queue.on_processed(rollups.on_webhook_batch)
+
+async def refresh_catalog(business_id: str):
+    """Re-reads a business after a write and patches the in-memory catalog views."""
+    await catalog_cache.refresh(get_database(), business_id)
 
 # Pydantic Models for API
 class CartItem(BaseModel):
@@ -83,6 +154,8 @@ class CartItem(BaseModel):
     quantity: int = 1
     business_name: str
     business_slug: str
+    business_id: Optional[str] = None
+    auto_synced: bool = False
 
 class CheckoutRequest(BaseModel):
     customer_name: str
@@ -92,6 +165,19 @@ class CheckoutRequest(BaseModel):
     total_amount: float
     payment_method: str = "card"
 
+class QuoteItem(BaseModel):
+    code: str
+    whatsapp_id: Optional[str] = None
+    quantity: int = 1
+    price: Optional[float] = None
+    business_slug: Optional[str] = None
+    business_id: Optional[str] = None
+    auto_synced: bool = False
+    name: Optional[str] = None
+
+class CartQuoteRequest(BaseModel):
+    items: List[QuoteItem]
+
 class ProductCreate(BaseModel):
     code: str
     whatsapp_id: Optional[str] = None
@@ -139,29 +225,56 @@ class Token(BaseModel):
     access_token: str
     token_type: str
 
-# Dependency to get current user
-async def get_current_user(token: str = Depends(oauth2_scheme)):
-    credentials_exception = HTTPException(
+def credentials_error() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+async def decode_token(token: str) -> dict:
+    """Verifies a JWT and, for tokens with a version claim, checks it has not been revoked."""
     payload = auth_utils.decode_access_token(token)
-    if payload is None:
-        raise credentials_exception
-    email: str = payload.get("sub")
-    if email is None:
-        raise credentials_exception
-    
-    db = get_database()
+    if payload is None or payload.get("sub") is None:
+        raise credentials_error()
+    if "ver" in payload:
+        await token_versions.ensure_fresh(get_database())
+        if payload["ver"] < token_versions.current(payload["sub"].lower()):
+            raise credentials_error()
+    return payload
+
+async def load_user(email: str) -> dict:
     # Normalize email to lowercase for lookup
-    user = await db.users.find_one({"email": email.lower()})
+    email = email.lower()
+    user = user_cache.get(email)
     if user is None:
-        raise credentials_exception
+        db = get_database()
+        user = await db.users.find_one({"email": email})
+        if user is None:
+            raise credentials_error()
+        user_cache.put(email, user)
     return user
 
+# Dependency to get current user
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    payload = await decode_token(token)
+    return await load_user(payload["sub"])
+
+# Dependency for endpoints that only need identity and roles. Tokens with
+# role claims are authorized without touching the users collection.
+async def get_current_principal(token: str = Depends(oauth2_scheme)):
+    payload = await decode_token(token)
+    if "ver" not in payload:
+        # Tokens issued before role claims existed
+        return await load_user(payload["sub"])
+    return {
+        "email": payload["sub"].lower(),
+        "is_admin": bool(payload.get("is_admin")),
+        "is_merchant": bool(payload.get("is_merchant")),
+    }
+
 # Dependency to check if current user is admin
-async def get_current_admin(current_user: dict = Depends(get_current_user)):
+async def get_current_admin(current_user: dict = Depends(get_current_principal)):
     if not current_user.get("is_admin"):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -169,6 +282,15 @@ async def get_current_admin(current_user: dict = Depends(get_current_user)):
         )
     return current_user
 
+# Dependency to check if current user is a merchant (admins included)
+async def get_current_merchant(current_user: dict = Depends(get_current_principal)):
+    if not current_user.get("is_merchant") and not current_user.get("is_admin"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have merchant privileges",
+        )
+    return current_user
+
 @app.get("/")
 async def read_root():
     return {"message": "Welcome to Nee Commerce API (MongoDB Driven)"}
@@ -178,32 +300,188 @@ async def ping():
     return {"status": "pong"}
 
 @app.get("/businesses")
-async def get_businesses():
-    """Returns the list of all businesses and their catalogs from MongoDB."""
+async def get_businesses(
+    request: Request,
+    after: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    fields: Optional[str] = None,
+    category: Optional[str] = None,
+):
+    """
+    Returns approved businesses ordered by id, one keyset page at a time.
+    When more results exist, the cursor for the next page is sent in the
+    X-Next-Cursor header so the body stays a plain list. Served from the
+    in-memory catalog snapshot without a database round trip.
+    """
+    requested = parse_fields(fields)
+    await catalog_cache.ensure_loaded(get_database())
+    precompressed = requested is None or requested is SUMMARY_FIELDS
+    # Projected listings are compressed by CompressionMiddleware with the same
+    # negotiation, so the encoding is part of every variant's ETag.
+    encoding = negotiated_encoding(request)
+    # The ETag depends only on snapshot content, the query and the encoding,
+    # so a match is answered before anything is paged or serialized.
+    etag = f'"{digest(catalog_cache.digest, request.url.query, encoding or "")}"'
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=conditional_headers(etag, PUBLIC_CACHE_CONTROL))
+
+    page, next_cursor = catalog_cache.page(after, limit, category)
+    headers = conditional_headers(etag, PUBLIC_CACHE_CONTROL)
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+
+    if not precompressed:
+        projected = []
+        for entry in page:
+            item = {"id": entry.doc["id"]}
+            item.update({f: entry.doc[f] for f in requested if f in entry.doc})
+            projected.append(item)
+        return ORJSONResponse(projected, headers=headers)
+
+    # Full and summary listings are served from precompressed snapshot bytes
+    view = "full" if requested is None else "summary"
+    body = catalog_cache.encoded(("businesses", request.url.query), encoding, lambda: join_businesses(page, view))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type="application/json", headers=headers)
+
+def sort_products(products: List[Dict], sort: Optional[str]) -> List[Dict]:
+    """Orders a storefront's products; None keeps catalog order."""
+    if sort == "price":
+        return sorted(products, key=lambda p: p.get("price", 0))
+    if sort == "featured":
+        return sorted(products, key=lambda p: not p.get("featured", False))
+    return products
+
+def parse_offset_cursor(cursor: Optional[str]) -> int:
+    try:
+        offset = int(cursor) if cursor else 0
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return offset
+
+# Sort keys for $sortArray when a storefront is read straight from MongoDB
+PRODUCT_SORT_SPECS = {"price": {"price": 1}, "featured": {"featured": -1}}
+
+async def fetch_storefront(db, slug: str, sort: Optional[str], offset: int, limit: int) -> Optional[Dict]:
+    """
+    Reads one business with only the requested slice of its products. The
+    array is sorted and $slice'd server-side so it is never shipped whole.
+    """
+    products = {"$ifNull": ["$products", []]}
+    if sort:
+        products = {"$sortArray": {"input": products, "sortBy": PRODUCT_SORT_SPECS[sort]}}
+    results = await db.businesses.aggregate([
+        {"$match": {"slug": slug, "is_approved": {"$ne": False}}},
+        {"$limit": 1},
+        {"$set": {
+            "product_count": {"$size": {"$ifNull": ["$products", []]}},
+            "products": {"$slice": [products, offset, limit]},
+        }},
+    ]).to_list(length=1)
+    return results[0] if results else None
+
+@app.get("/businesses/{slug}")
+async def get_business_by_slug(
+    request: Request,
+    slug: str,
+    sort: Optional[Literal["price", "featured"]] = None,
+    limit: int = Query(24, ge=1, le=100),
+    after: Optional[str] = None,
+):
+    """
+    Returns one storefront: the business header plus a page of its products.
+    The next page's cursor is returned as next_cursor.
+    """
     db = get_database()
-    businesses = await db.businesses.find({"is_approved": {"$ne": False}}).to_list(length=100)
-    return sanitize_mongo_obj(businesses)
+    offset = parse_offset_cursor(after)
+
+    if not catalog_cache.loaded:
+        # Cold worker: answer from MongoDB and warm the snapshot in the background
+        catalog_cache.warm(db)
+        business = await fetch_storefront(db, slug, sort, offset, limit)
+        if business is None:
+            raise HTTPException(status_code=404, detail="Business not found")
+        total = business.pop("product_count")
+        business = to_public(business)
+        business["product_count"] = total
+        business["next_cursor"] = str(offset + limit) if offset + limit < total else None
+        return ORJSONResponse(business, headers={"Cache-Control": PUBLIC_CACHE_CONTROL})
+
+    await catalog_cache.ensure_loaded(db)
+    entry = catalog_cache.get_by_slug(slug)
+    if entry is None or not entry.approved:
+        raise HTTPException(status_code=404, detail="Business not found")
+
+    etag = f'"{digest(entry.etag, request.url.query, negotiated_encoding(request) or "")}"'
+    headers = conditional_headers(etag, PUBLIC_CACHE_CONTROL)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    products = entry.doc.get("products", [])
+    storefront = {k: v for k, v in entry.doc.items() if k != "products"}
+    storefront["products"] = sort_products(products, sort)[offset:offset + limit]
+    storefront["product_count"] = len(products)
+    storefront["next_cursor"] = str(offset + limit) if offset + limit < len(products) else None
+    return ORJSONResponse(storefront, headers=headers)
+
+@app.get("/search")
+async def search_catalog(
+    q: str = "",
+    type: Literal["products", "businesses"] = "products",
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    category: Optional[str] = None,
+):
+    """Ranked, paginated catalog search served from the in-memory index."""
+    await catalog_cache.ensure_loaded(get_database())
+    offset = parse_offset_cursor(cursor)
+    return catalog_index.search(q, kind=type, limit=limit, offset=offset, category=category)
 
 @app.get("/my-businesses")
-async def get_my_businesses(current_user: dict = Depends(get_current_user)):
+async def get_my_businesses(request: Request, current_user: dict = Depends(get_current_principal)):
     """Returns businesses owned by the current user."""
-    db = get_database()
-    businesses = await db.businesses.find({"owner_email": current_user["email"]}).to_list(length=100)
-    return sanitize_mongo_obj(businesses)
+    await catalog_cache.ensure_loaded(get_database())
+    owned = catalog_cache.owned_by(current_user["email"])
+    etag = f'"{digest(negotiated_encoding(request) or "", *(e.etag for e in owned))}"'
+    headers = conditional_headers(etag, PRIVATE_CACHE_CONTROL)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(join_businesses(owned), media_type="application/json", headers=headers)
 
 @app.get("/admin/users")
 async def admin_get_users(current_admin: dict = Depends(get_current_admin)):
     """Returns all registered users (Admin only)."""
     db = get_database()
-    users = await db.users.find().to_list(length=100)
-    return sanitize_mongo_obj(users)
+    users = await db.users.find({}, {"hashed_password": 0}).to_list(length=100)
+    return ORJSONResponse(to_public_list(users))
+
+@app.get("/admin/metrics")
+async def admin_get_metrics(current_admin: dict = Depends(get_current_admin)):
+    """Returns in-process cache counters (Admin only)."""
+    return {
+        "user_cache": user_cache.stats(),
+        "analytics_cache": analytics_cache.stats(),
+        "scrape_cache": scrape_cache.stats(),
+        "webhooks": await webhook_queue.metrics(get_database()),
+    }
+
+@app.post("/admin/users/{email}/revoke-tokens")
+async def admin_revoke_tokens(email: str, current_admin: dict = Depends(get_current_admin)):
+    """Invalidates every token issued to a user, e.g. after a role change (Admin only)."""
+    email = email.lower()
+    version = await token_versions.revoke(get_database(), email)
+    user_cache.invalidate(email)
+    return {"status": "success", "token_version": version}
 
 @app.get("/admin/businesses")
 async def admin_get_businesses(current_admin: dict = Depends(get_current_admin)):
     """Returns all businesses with owner info (Admin only)."""
     db = get_database()
     businesses = await db.businesses.find().to_list(length=100)
-    return sanitize_mongo_obj(businesses)
+    return ORJSONResponse(to_public_list(businesses))
 
 @app.put("/admin/businesses/{business_id}/approve")
 async def approve_business(business_id: str, current_admin: dict = Depends(get_current_admin)):
@@ -214,27 +492,42 @@ async def approve_business(business_id: str, current_admin: dict = Depends(get_c
         existing = await db.businesses.find_one({"_id": business_id})
         if not existing:
             raise HTTPException(status_code=404, detail="Business not found")
+    await refresh_catalog(business_id)
     return {"status": "success"}
 
+async def owned_business_ids(email: str) -> List[str]:
+    businesses = await get_database().businesses.find({"owner_email": email}, {"_id": 1}).to_list(length=100)
+    return [str(b["_id"]) for b in businesses]
+
 @app.get("/merchant/orders")
-async def get_merchant_orders(current_user: dict = Depends(get_current_user)):
-    """Returns orders that contain products from businesses owned by the merchant."""
+async def get_merchant_orders(current_user: dict = Depends(get_current_merchant)):
+    """Returns orders containing the merchant's products, with only the merchant's items."""
     db = get_database()
-    # Find businesses owned by the user
-    my_businesses = await db.businesses.find({"owner_email": current_user["email"]}).to_list(length=100)
-    my_business_names = [b["name"] for b in my_businesses]
-    
-    # Simple strategy: find orders where at least one item matches my business name
-    # In a more robust system, we'd use business IDs
-    orders = await db.orders.find({"items.business_name": {"$in": my_business_names}}).to_list(length=100)
-    
-    # Filter items in each order to only show what belongs to this merchant (optional but helpful)
-    for order in orders:
-        order["id"] = order.get("_id")
-        # Keep all order info but maybe the merchant only cares about their share? 
-        # For now return full order for context.
-        
-    return sanitize_mongo_obj(orders)
+    my_business_ids = await owned_business_ids(current_user["email"])
+    orders = await db.orders.aggregate([
+        {"$match": {"business_ids": {"$in": my_business_ids}}},
+        {"$sort": {"created_at": -1}},
+        {"$limit": 100},
+        {"$addFields": {"items": {"$filter": {
+            "input": "$items",
+            "cond": {"$in": ["$$this.business_id", my_business_ids]},
+        }}}},
+    ]).to_list(length=100)
+    return ORJSONResponse(to_public_list(orders))
+
+@app.get("/merchant/orders/export")
+async def export_merchant_orders(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    current_user: dict = Depends(get_current_merchant),
+):
+    """Streams the merchant's orders, oldest first, with only the merchant's items."""
+    my_business_ids = await owned_business_ids(current_user["email"])
+    query = order_queries.build_filter(start=start, end=end)
+    query["business_ids"] = {"$in": my_business_ids}
+    cursor = get_database().orders.find(query).sort(order_export.EXPORT_SORT)
+    return export_response(cursor, format, "merchant-orders", my_business_ids)
 
 # AUTH ENDPOINTS
 @app.post("/auth/signup", response_model=UserResponse)
@@ -244,7 +537,7 @@ async def signup(user_data: UserSignup):
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
         
-    hashed_pwd = auth_utils.get_password_hash(user_data.password)
+    hashed_pwd = await auth_utils.get_password_hash_async(user_data.password)
     user_email = user_data.email.lower().strip()
     new_user = {
         "email": user_email,
@@ -256,7 +549,7 @@ async def signup(user_data: UserSignup):
         "created_at": datetime.utcnow()
     }
     await db.users.insert_one(new_user)
-    return sanitize_mongo_obj(new_user)
+    return new_user
 
 @app.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
@@ -272,7 +565,7 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    is_valid = auth_utils.verify_password(form_data.password, user["hashed_password"])
+    is_valid = await auth_utils.verify_password_async(form_data.password, user["hashed_password"])
     print(f"Password valid: {is_valid}")
     
     if not is_valid:
@@ -281,12 +574,18 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = auth_utils.create_access_token(data={"sub": user["email"]})
+
+    # Upgrade the stored hash when the configured work factor has changed
+    if auth_utils.password_needs_rehash(user["hashed_password"]):
+        new_hash = await auth_utils.get_password_hash_async(form_data.password)
+        await db.users.update_one({"_id": user["_id"]}, {"$set": {"hashed_password": new_hash}})
+        user_cache.invalidate(user["email"])
+    access_token = auth_utils.create_access_token(data={"sub": user["email"]}, user=user)
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.get("/auth/me", response_model=UserResponse)
 async def get_me(current_user: dict = Depends(get_current_user)):
-    return sanitize_mongo_obj(current_user)
+    return current_user
 
 @app.put("/auth/me", response_model=UserResponse)
 async def update_me(user_data: UserUpdate, current_user: dict = Depends(get_current_user)):
@@ -294,71 +593,117 @@ async def update_me(user_data: UserUpdate, current_user: dict = Depends(get_curr
     update_data = {k: v for k, v in user_data.dict().items() if v is not None}
     
     if not update_data:
-        return sanitize_mongo_obj(current_user)
+        return current_user
         
     await db.users.update_one(
         {"_id": current_user["_id"]},
         {"$set": update_data}
     )
+    user_cache.invalidate(current_user["email"])
     
     updated_user = await db.users.find_one({"_id": current_user["_id"]})
-    return sanitize_mongo_obj(updated_user)
+    return updated_user
 
 @app.get("/sync/{identifier:path}")
-async def sync_product(identifier: str):
+async def sync_product(identifier: str, response: Response, refresh: bool = False):
     """
-    The Sync Station Endpoint.
+    The Sync Station Endpoint. Scraped products are cached; X-Cache is
+    HIT, MISS or STALE, and a STALE result can be revalidated with ?refresh=true.
     """
     db = get_database()
     clean_id = data_manager.extract_whatsapp_id(identifier)
     
-    # Search in DB
-    product = await db.businesses.find_one({"products.code": identifier}, {"products.$": 1, "name": 1, "slug": 1})
-    if not product:
-        product = await db.businesses.find_one({"products.whatsapp_id": clean_id}, {"products.$": 1, "name": 1, "slug": 1})
-    
+    # Resolve known products from the in-memory code / WhatsApp ID index
+    await catalog_cache.ensure_loaded(db)
+    product = product_index.resolve(identifier)
     if product:
-        p = product["products"][0]
-        return {
-            "code": p["code"],
-            "whatsapp_id": p.get("whatsapp_id"),
-            "name": p["name"],
-            "price": p["price"],
-            "description": p.get("description"),
-            "image": p.get("image"),
-            "business_name": product["name"],
-            "business_slug": product["slug"]
-        }
+        return product
     
-    # Fallback to scraping
+    # Fallback to scraping, through the scrape cache
     if "http" in identifier:
-        scraped = data_manager.scrape_whatsapp_metadata(identifier)
-        if scraped: return scraped
+        url = identifier
     elif clean_id and len(clean_id) > 10:
         url = f"https://wa.me/p/{clean_id}"
-        scraped = data_manager.scrape_whatsapp_metadata(url)
-        if scraped: return scraped
-            
-    raise HTTPException(status_code=404, detail="Product not found.")
+    else:
+        raise HTTPException(status_code=404, detail="Product not found.")
+
+    scraped, meta = await scrape_cache.lookup(db, url, refresh=refresh)
+    headers = {
+        "X-Cache": "STALE" if meta["status"] == "stale" else "HIT" if meta["status"] == "hit" else "MISS",
+        "Age": str(meta["age_seconds"]),
+        "X-Scraped-At": meta["fetched_at"].isoformat() + "Z",
+    }
+    if not scraped:
+        # Known-bad links are remembered briefly, so repeat pastes fail fast
+        raise HTTPException(status_code=404, detail="Product not found.", headers=headers)
+    response.headers.update(headers)
+    return scraped
+
+async def quote_items(items: List[Dict]) -> Dict:
+    """
+    Prices cart items from the price index. Sync Station products that were
+    scraped from WhatsApp rather than listed in the catalog are priced from
+    the server-side scrape cache, never from the submitted price.
+    """
+    db = get_database()
+    await catalog_cache.ensure_loaded(db)
+    synced = {}
+    for item in items:
+        whatsapp_id = normalize_whatsapp_id(item.get("whatsapp_id"))
+        if not item.get("auto_synced") or not whatsapp_id or whatsapp_id in synced:
+            continue
+        if price_index.lookup(item.get("code"), item.get("business_id"), item.get("business_slug")):
+            continue
+        product, _ = await scrape_cache.lookup(db, f"https://wa.me/p/{whatsapp_id}")
+        synced[whatsapp_id] = synced_entry(product)
+    return price_index.quote(items, {k: v for k, v in synced.items() if v})
+
+def order_business_ids(items: List[Dict]) -> List[str]:
+    # Scraped WhatsApp products have no catalog business
+    return sorted({item["business_id"] for item in items if item.get("business_id")})
+
+async def price_cart(checkout_data: CheckoutRequest) -> Dict:
+    """
+    Reprices a checkout with quote_items. Carts with missing
+    products, changed prices or a different total are rejected with the
+    fresh quote so the client can update and resubmit.
+    """
+    if not checkout_data.items:
+        raise HTTPException(status_code=400, detail="Cart is empty")
+    quote = await quote_items([item.dict() for item in checkout_data.items])
+    if quote["unavailable"]:
+        names = ", ".join(item["name"] or item["code"] for item in quote["unavailable"])
+        raise HTTPException(status_code=409, detail={"message": f"Some items in your cart are no longer available: {names}. Please remove them to continue.", **quote})
+    if quote["changed"] or round(checkout_data.total_amount, 2) != quote["total_amount"]:
+        raise HTTPException(status_code=409, detail={"message": "Some prices in your cart have changed. Please review your cart.", **quote})
+    return quote
+
+@app.post("/cart/quote")
+async def quote_cart(request: CartQuoteRequest):
+    """Current prices and totals for a whole cart in one request."""
+    return await quote_items([item.dict() for item in request.items])
 
 @app.post("/payments/initialize")
 async def initialize_payment(request: Request, checkout_data: CheckoutRequest):
     db = get_database()
+    quote = await price_cart(checkout_data)
     try:
-        order_id = f"ORD-{int(time.time())}"
+        order_id = order_ids.new_order_id()
         
         new_order = {
             "_id": order_id,
             "customer_name": checkout_data.customer_name,
             "customer_email": checkout_data.customer_email,
             "customer_phone": checkout_data.customer_phone,
-            "total_amount": checkout_data.total_amount,
+            "total_amount": quote["total_amount"],
             "payment_method": checkout_data.payment_method,
             "status": "pending",
             "created_at": datetime.utcnow(),
-            "items": [item.dict() for item in checkout_data.items]
+            "items": quote["items"],
+            "business_ids": order_business_ids(quote["items"])
         }
         await db.orders.insert_one(new_order)
+        await rollups.sync_order(db, order_id, "pending")
 
         if PAYSTACK_SECRET_KEY == "sk_test_placeholder":
             return {
@@ -369,53 +714,55 @@ async def initialize_payment(request: Request, checkout_data: CheckoutRequest):
                 "demo_mode": True
             }
 
-        headers = {
-            "Authorization": f"Bearer {PAYSTACK_SECRET_KEY}",
-            "Content-Type": "application/json"
-        }
         paystack_payload = {
             "email": checkout_data.customer_email,
-            "amount": int(checkout_data.total_amount * 100),
+            "amount": int(round(quote["total_amount"] * 100)),
             "reference": order_id,
             "callback_url": f"{FRONTEND_URL}/admin" 
         }
 
-        response = requests.post(f"{PAYSTACK_API_URL}/transaction/initialize", json=paystack_payload, headers=headers)
-        if not response.ok:
+        try:
+            res_data = await paystack_client.paystack.initialize_transaction(paystack_payload)
+        except paystack_client.PaystackError as e:
             await db.orders.update_one({"_id": order_id}, {"$set": {"status": "failed"}})
-            raise HTTPException(status_code=response.status_code, detail=f"Paystack error: {response.text}")
+            await rollups.sync_order(db, order_id, "failed")
+            raise HTTPException(status_code=e.status_code, detail=f"Paystack error: {e.detail}")
 
-        res_data = response.json()
         return {
             "status": "success",
             "authorization_url": res_data["data"]["authorization_url"],
             "reference": res_data["data"]["reference"],
             "order_id": order_id
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Payment initialization failed: {str(e)}")
 
 @app.post("/checkout")
 async def process_checkout(checkout_data: CheckoutRequest):
     db = get_database()
+    quote = await price_cart(checkout_data)
     try:
-        order_id = f"ORD-{int(time.time())}"
+        order_id = order_ids.new_order_id()
         new_order = {
             "_id": order_id,
             "customer_name": checkout_data.customer_name,
             "customer_email": checkout_data.customer_email,
             "customer_phone": checkout_data.customer_phone,
-            "total_amount": checkout_data.total_amount,
+            "total_amount": quote["total_amount"],
             "payment_method": checkout_data.payment_method,
             "status": "completed",
             "created_at": datetime.utcnow(),
-            "items": [item.dict() for item in checkout_data.items]
+            "items": quote["items"],
+            "business_ids": order_business_ids(quote["items"])
         }
         await db.orders.insert_one(new_order)
+        await rollups.sync_order(db, order_id, "completed")
         return {
             "status": "success",
             "order_id": order_id,
-            "total": checkout_data.total_amount
+            "total": quote["total_amount"]
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -423,111 +770,119 @@ async def process_checkout(checkout_data: CheckoutRequest):
 
 @app.post("/webhook/paystack")
 async def paystack_webhook(request: Request):
-    db = get_database()
+    """
+    Verifies and persists a Paystack event, then acknowledges immediately.
+    Orders are updated by the webhook_queue worker.
+    """
+    body = await request.body()
+    # Demo mode has no secret to sign with; the admin dashboard simulates events unsigned
+    if PAYSTACK_SECRET_KEY != "sk_test_placeholder" and not verify_signature(body, request.headers.get("x-paystack-signature"), PAYSTACK_SECRET_KEY):
+        raise HTTPException(status_code=401, detail="Invalid signature")
     try:
-        payload = await request.json()
-        if payload.get("event") == "charge.success":
-            reference = payload.get("data", {}).get("reference")
-            await db.orders.update_one({"_id": reference}, {"$set": {"status": "completed", "updated_at": datetime.utcnow()}})
-            return {"status": "success"}
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+    if not isinstance(payload, dict) or not isinstance(payload.get("data", {}), dict):
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+
+    if payload.get("event") not in ("charge.success", "charge.failed"):
         return {"status": "ignored"}
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
+    accepted = await webhook_queue.enqueue(get_database(), payload, body)
+    return {"status": "success", "duplicate": not accepted}
 
 @app.get("/orders")
-async def get_orders(current_admin: dict = Depends(get_current_admin)):
-    db = get_database()
-    orders = await db.orders.find().to_list(length=100)
-    for order in orders:
-        order["id"] = order.get("_id")
-    return orders
+async def get_orders(
+    after: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    status: Optional[str] = None,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    customer_email: Optional[str] = None,
+    customer_phone: Optional[str] = None,
+    business_id: Optional[str] = None,
+    current_admin: dict = Depends(get_current_admin),
+):
+    """
+    Newest orders first, one keyset page on (created_at, _id) at a time.
+    Items are left out of the list; fetch /orders/{order_id} for the full order.
+    The next page's cursor is sent in the X-Next-Cursor header.
+    """
+    try:
+        query = order_queries.build_filter(status, start, end, customer_email, customer_phone, business_id, after)
+    except order_queries.InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    orders = await get_database().orders.find(query, order_queries.LIST_PROJECTION).sort(order_queries.SORT).limit(limit + 1).to_list(length=limit + 1)
+    headers = {}
+    if len(orders) > limit:
+        orders = orders[:limit]
+        headers["X-Next-Cursor"] = order_queries.encode_cursor(orders[-1])
+    return ORJSONResponse(to_public_list(orders), headers=headers)
+
+def export_response(cursor, fmt: str, prefix: str, business_ids: Optional[List[str]] = None) -> StreamingResponse:
+    return StreamingResponse(
+        order_export.stream(cursor, fmt, business_ids),
+        media_type=order_export.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{order_export.filename(prefix, fmt)}"'},
+    )
 
-from collections import defaultdict
+@app.get("/orders/export")
+async def export_orders(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    status: Optional[str] = None,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    customer_email: Optional[str] = None,
+    customer_phone: Optional[str] = None,
+    business_id: Optional[str] = None,
+    current_admin: dict = Depends(get_current_admin),
+):
+    """Streams every matching order, oldest first. Takes the same filters as /orders."""
+    query = order_queries.build_filter(status, start, end, customer_email, customer_phone, business_id)
+    cursor = get_database().orders.find(query).sort(order_export.EXPORT_SORT)
+    return export_response(cursor, format, "orders")
+
+@app.get("/orders/{order_id}")
+async def get_order(order_id: str, current_admin: dict = Depends(get_current_admin)):
+    order = await get_database().orders.find_one({"_id": order_id})
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return ORJSONResponse(to_public(order))
+
+async def cached_analytics(response: Response, key: tuple, business_ids: Optional[List[str]], compute) -> Dict:
+    result, outcome = await analytics_cache.get_or_compute(key, business_ids, compute)
+    response.headers["X-Cache"] = "MISS" if outcome == "miss" else "HIT"
+    return result
 
 @app.get("/admin/analytics")
-async def get_admin_analytics(current_admin: dict = Depends(get_current_admin)):
-    db = get_database()
-    orders = await db.orders.find().to_list(length=1000)
-    
-    daily_revenue_map = defaultdict(float)
-    product_sales = defaultdict(int)
-    business_sales = defaultdict(float)
-    
-    for order in orders:
-        # We can analyze all orders or just completed ones. Let's stick to completed for revenue.
-        if order.get("status") not in ["completed", "pending"]: # Include pending for demo purposes
-            continue
-            
-        date_str = order.get("created_at", datetime.utcnow()).strftime("%m/%d")
-        daily_revenue_map[date_str] += order.get("total_amount", 0)
-        
-        for item in order.get("items", []):
-            prod_name = item.get("name")
-            biz_name = item.get("business_name")
-            qty = item.get("quantity", 1)
-            
-            product_sales[prod_name] += qty
-            business_sales[biz_name] += (item.get("price", 0) * qty)
-            
-    daily_revenue = [{"date": k, "revenue": v} for k, v in sorted(daily_revenue_map.items())[-30:]]
-    top_products = [{"name": k, "sales": v} for k, v in sorted(product_sales.items(), key=lambda x: x[1], reverse=True)[:5]]
-    top_businesses = [{"name": k, "revenue": v} for k, v in sorted(business_sales.items(), key=lambda x: x[1], reverse=True)[:5]]
-    
-    return {
-        "dailyRevenue": daily_revenue,
-        "topProducts": top_products,
-        "topBusinesses": top_businesses
-    }
+async def get_admin_analytics(
+    response: Response,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    granularity: Literal["day", "week", "month"] = "day",
+    current_admin: dict = Depends(get_current_admin),
+):
+    start, end = analytics.resolve_range(start, end)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="'from' must be before 'to'")
+    # Rollups are per day, so requests within the same days share an entry
+    key = ("admin", rollups.day_of(start), rollups.day_of(end), granularity)
+    return await cached_analytics(response, key, None, lambda: analytics.admin_analytics(get_database(), start, end, granularity))
 
 @app.get("/merchant/analytics")
-async def get_merchant_analytics(current_user: dict = Depends(get_current_user)):
-    db = get_database()
-    my_businesses = await db.businesses.find({"owner_email": current_user["email"]}).to_list(length=100)
-    my_business_names = [b["name"] for b in my_businesses]
-    my_business_slugs = [b["slug"] for b in my_businesses]
-    
-    orders = await db.orders.find({"$or": [{"items.business_name": {"$in": my_business_names}}, {"items.business_slug": {"$in": my_business_slugs}}]}).to_list(length=1000)
-    
-    daily_revenue_map = defaultdict(float)
-    product_sales = defaultdict(int)
-    total_revenue = 0
-    total_orders = 0
-    
-    for order in orders:
-        if order.get("status") not in ["completed", "pending"]:
-            continue
-            
-        merchant_share = 0
-        has_merchant_item = False
-        
-        for item in order.get("items", []):
-            if item.get("business_name") in my_business_names or item.get("business_slug") in my_business_slugs:
-                qty = item.get("quantity", 1)
-                revenue = item.get("price", 0) * qty
-                merchant_share += revenue
-                has_merchant_item = True
-                
-                prod_name = item.get("name")
-                product_sales[prod_name] += qty
-                
-        if has_merchant_item:
-            total_orders += 1
-            total_revenue += merchant_share
-            date_str = order.get("created_at", datetime.utcnow()).strftime("%m/%d")
-            daily_revenue_map[date_str] += merchant_share
-            
-    daily_revenue = [{"date": k, "revenue": v} for k, v in sorted(daily_revenue_map.items())[-30:]]
-    top_products = [{"name": k, "sales": v} for k, v in sorted(product_sales.items(), key=lambda x: x[1], reverse=True)[:5]]
-    
-    return {
-        "totalRevenue": total_revenue,
-        "totalOrders": total_orders,
-        "dailyRevenue": daily_revenue,
-        "topProducts": top_products
-    }
+async def get_merchant_analytics(
+    response: Response,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    granularity: Literal["day", "week", "month"] = "day",
+    current_user: dict = Depends(get_current_merchant),
+):
+    my_business_ids = await owned_business_ids(current_user["email"])
+    days = tuple(rollups.day_of(moment) for moment in analytics.resolve_range(start, end)) if start or end else None
+    key = ("merchant", tuple(sorted(my_business_ids)), days, granularity)
+    return await cached_analytics(response, key, my_business_ids, lambda: analytics.merchant_analytics(get_database(), my_business_ids, start, end, granularity))
 
 @app.post("/upload")
-async def upload_file(request: Request, file: UploadFile = File(...), current_user: dict = Depends(get_current_user)):
+async def upload_file(request: Request, file: UploadFile = File(...), current_user: dict = Depends(get_current_principal)):
     try:
         file_extension = os.path.splitext(file.filename)[1]
         unique_filename = f"{uuid.uuid4()}{file_extension}"
@@ -540,7 +895,7 @@ async def upload_file(request: Request, file: UploadFile = File(...), current_us
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.put("/businesses/{business_id}")
-async def update_business(business_id: str, business_update: BusinessUpdate, current_user: dict = Depends(get_current_user)):
+async def update_business(business_id: str, business_update: BusinessUpdate, current_user: dict = Depends(get_current_principal)):
     db = get_database()
     
     # Check ownership unless admin
@@ -553,10 +908,11 @@ async def update_business(business_id: str, business_update: BusinessUpdate, cur
         
     update_data = business_update.dict(exclude_unset=True)
     result = await db.businesses.update_one({"_id": business_id}, {"$set": update_data})
+    await refresh_catalog(business_id)
     return {"status": "success"}
 
 @app.post("/businesses")
-async def create_business(business: BusinessCreate, current_user: dict = Depends(get_current_user)):
+async def create_business(business: BusinessCreate, current_user: dict = Depends(get_current_principal)):
     db = get_database()
     if not current_user.get("is_merchant") and not current_user.get("is_admin"):
         raise HTTPException(status_code=403, detail="Only merchants can create businesses")
@@ -578,10 +934,11 @@ async def create_business(business: BusinessCreate, current_user: dict = Depends
     }
     
     await db.businesses.insert_one(new_business)
-    return sanitize_mongo_obj(new_business)
+    await refresh_catalog(new_business["_id"])
+    return to_public(new_business)
 
 @app.post("/products")
-async def create_product(product: ProductCreate, current_user: dict = Depends(get_current_user)):
+async def create_product(product: ProductCreate, current_user: dict = Depends(get_current_principal)):
     db = get_database()
     
     # Check ownership
@@ -596,10 +953,11 @@ async def create_product(product: ProductCreate, current_user: dict = Depends(ge
         {"_id": product.business_id},
         {"$push": {"products": product.dict()}}
     )
+    await refresh_catalog(product.business_id)
     return product
 
 @app.delete("/products/{business_id}/{product_code}")
-async def delete_product(business_id: str, product_code: str, current_user: dict = Depends(get_current_user)):
+async def delete_product(business_id: str, product_code: str, current_user: dict = Depends(get_current_principal)):
     db = get_database()
     
     # Check ownership
@@ -616,6 +974,7 @@ async def delete_product(business_id: str, product_code: str, current_user: dict
     )
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
+    await refresh_catalog(business_id)
     return {"status": "success"}
 
 if __name__ == "__main__":
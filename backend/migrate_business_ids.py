@@ -0,0 +1,51 @@
+"""
+Backfills business_id on order items and the order-level business_ids array.
+
+Older orders only name their businesses by slug or display name. Items are
+matched against the current businesses (slug first, then name); items that
+no longer match any business keep no business_id and are reported.
+Sales rollups are rebuilt afterwards so they are keyed by business_id too.
+
+    python migrate_business_ids.py
+"""
+import asyncio
+
+from pymongo import UpdateOne
+
+import rollups
+from database import get_database
+
+BATCH_SIZE = 500
+
+async def migrate():
+    db = get_database()
+    businesses = await db.businesses.find({}, {"name": 1, "slug": 1}).to_list(length=None)
+    by_slug = {b["slug"]: str(b["_id"]) for b in businesses if b.get("slug")}
+    by_name = {b["name"]: str(b["_id"]) for b in businesses if b.get("name")}
+
+    updated, unmatched = 0, 0
+    operations = []
+    async for order in db.orders.find({"business_ids": {"$exists": False}}, {"items": 1}):
+        items = order.get("items", [])
+        for item in items:
+            if not item.get("business_id"):
+                business_id = by_slug.get(item.get("business_slug")) or by_name.get(item.get("business_name"))
+                if business_id:
+                    item["business_id"] = business_id
+                else:
+                    unmatched += 1
+        business_ids = sorted({item["business_id"] for item in items if item.get("business_id")})
+        operations.append(UpdateOne({"_id": order["_id"]}, {"$set": {"items": items, "business_ids": business_ids}}))
+        if len(operations) >= BATCH_SIZE:
+            await db.orders.bulk_write(operations, ordered=False)
+            updated += len(operations)
+            operations = []
+    if operations:
+        await db.orders.bulk_write(operations, ordered=False)
+        updated += len(operations)
+
+    print(f"Backfilled business_ids on {updated} orders ({unmatched} items matched no business).")
+    await rollups.rebuild(db)
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
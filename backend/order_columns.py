@@ -0,0 +1,341 @@
+"""
+Columnar snapshot of the order history for long-range reporting.
+
+Orders and their items are flattened into NumPy arrays once:
+    dates       int64 milliseconds since the Unix epoch
+    amounts     int64 kobo (fixed point, two decimals)
+    names       dictionary-encoded as int32 codes into string tables
+
+Group-bys, top-K and rolling windows then run as vectorized array
+operations instead of Python loops. A snapshot is saved as one .npy file
+per column and loaded back memory-mapped, so reports over years of orders
+don't have to fit the history in RAM or re-read it from MongoDB.
+
+    python order_columns.py snapshot [DIR]                      # build from MongoDB
+    python order_columns.py report [DIR] --period week --by category
+"""
+import os
+import json
+import argparse
+import asyncio
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+DEFAULT_SNAPSHOT_DIR = os.path.join(os.path.dirname(__file__), "data", "order_snapshot")
+MS_PER_DAY = 86_400_000
+# 1970-01-01 was a Thursday; shifting by 3 days makes weeks start on Monday
+WEEK_OFFSET_DAYS = 3
+STATUSES = ["pending", "completed", "failed"]
+REVENUE_STATUSES = ("completed", "pending")
+
+# Group-bys over at most this many distinct keys use a dense bincount instead of a sort
+DENSE_GROUP_LIMIT = 1 << 22
+
+ORDER_COLUMNS = ("order_ms", "order_kobo", "order_status", "order_customer")
+ITEM_COLUMNS = ("item_order", "item_product", "item_business", "item_category", "item_quantity", "item_kobo")
+# column -> (array.array typecode, NumPy dtype) with matching widths
+COLUMN_TYPES = {
+    "order_ms": ("q", np.int64),
+    "order_kobo": ("q", np.int64),
+    "order_status": ("b", np.int8),
+    "order_customer": ("i", np.int32),
+    "item_order": ("i", np.int32),
+    "item_product": ("i", np.int32),
+    "item_business": ("i", np.int32),
+    "item_category": ("i", np.int32),
+    "item_quantity": ("i", np.int32),
+    "item_kobo": ("q", np.int64),
+}
+SNAPSHOT_BATCH_SIZE = int(os.getenv("SNAPSHOT_BATCH_SIZE", "1000"))
+
+def to_kobo(amount) -> int:
+    return int(round(float(amount or 0) * 100))
+
+def to_ms(moment: datetime) -> int:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() * 1000)
+
+def group_sum(keys: np.ndarray, weights: np.ndarray):
+    """Sums weights per distinct key. Returns (sorted keys, sums)."""
+    if not len(keys):
+        return keys, np.zeros(0)
+    low = int(keys.min())
+    span = int(keys.max()) - low + 1
+    if span <= DENSE_GROUP_LIMIT:
+        offsets = keys - low
+        present = np.flatnonzero(np.bincount(offsets, minlength=span))
+        sums = np.bincount(offsets, weights=weights, minlength=span)
+        return present + low, sums[present]
+    unique, inverse = np.unique(keys, return_inverse=True)
+    return unique, np.bincount(inverse, weights=weights)
+
+class Dictionary:
+    """String -> dense int32 code table used to encode a column."""
+
+    def __init__(self, values: Optional[List[str]] = None):
+        self.values: List[str] = list(values or [])
+        self._codes = {value: code for code, value in enumerate(self.values)}
+
+    def encode(self, value) -> int:
+        value = "" if value is None else str(value)
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self):
+        return len(self.values)
+
+class SnapshotBuilder:
+    """
+    Appends orders one at a time into typed column buffers (array.array,
+    one machine word per value rather than a Python int object), which
+    become the snapshot's NumPy columns without another copy.
+    """
+
+    def __init__(self, categories: Optional[Dict[str, str]] = None):
+        self.categories = dict(categories or {})
+        self.products, self.businesses, self.category_names, self.customers = Dictionary(), Dictionary(), Dictionary(), Dictionary()
+        self.statuses = Dictionary(STATUSES)
+        self.buffers = {name: array(COLUMN_TYPES[name][0]) for name in ORDER_COLUMNS + ITEM_COLUMNS}
+        self.orders = 0
+
+    def add(self, order: Dict):
+        buffers = self.buffers
+        index = self.orders
+        self.orders += 1
+        buffers["order_ms"].append(to_ms(order.get("created_at") or datetime.utcnow()))
+        buffers["order_kobo"].append(to_kobo(order.get("total_amount")))
+        buffers["order_status"].append(self.statuses.encode(order.get("status")))
+        buffers["order_customer"].append(self.customers.encode(order.get("customer_email")))
+        for item in order.get("items", []):
+            business = item.get("business_id") or item.get("business_slug") or item.get("business_name")
+            quantity = item.get("quantity", 1)
+            buffers["item_order"].append(index)
+            buffers["item_product"].append(self.products.encode(item.get("name")))
+            buffers["item_business"].append(self.businesses.encode(item.get("business_name")))
+            buffers["item_category"].append(self.category_names.encode(self.categories.get(business)))
+            buffers["item_quantity"].append(quantity)
+            buffers["item_kobo"].append(to_kobo(item.get("price")) * quantity)
+
+    def finish(self) -> "OrderSnapshot":
+        columns = {name: np.frombuffer(buffer, dtype=COLUMN_TYPES[name][1]) for name, buffer in self.buffers.items()}
+        return OrderSnapshot(columns, {
+            "products": self.products.values,
+            "businesses": self.businesses.values,
+            "categories": self.category_names.values,
+            "customers": self.customers.values,
+            "statuses": self.statuses.values,
+        })
+
+class OrderSnapshot:
+    def __init__(self, columns: Dict[str, np.ndarray], dictionaries: Dict[str, List[str]]):
+        self.columns = columns
+        self.products = dictionaries["products"]
+        self.businesses = dictionaries["businesses"]
+        self.categories = dictionaries["categories"]
+        self.customers = dictionaries["customers"]
+        self.statuses = dictionaries["statuses"]
+
+    def __getattr__(self, name):
+        columns = self.__dict__.get("columns", {})
+        if name in columns:
+            return columns[name]
+        raise AttributeError(name)
+
+    @property
+    def order_count(self) -> int:
+        return len(self.columns["order_ms"])
+
+    @property
+    def item_count(self) -> int:
+        return len(self.columns["item_order"])
+
+    # -- building -----------------------------------------------------------
+
+    @classmethod
+    def build(cls, orders: Iterable[Dict], categories: Optional[Dict[str, str]] = None) -> "OrderSnapshot":
+        """
+        Flattens order documents. categories maps business_id (or slug) to its
+        category, since orders don't carry it.
+        """
+        builder = SnapshotBuilder(categories)
+        for order in orders:
+            builder.add(order)
+        return builder.finish()
+
+    @classmethod
+    async def from_database(cls, db) -> "OrderSnapshot":
+        """Streams orders from MongoDB, so only one cursor batch is held as dicts at a time."""
+        builder = SnapshotBuilder()
+        async for business in db.businesses.find({}, {"slug": 1, "category": 1}):
+            builder.categories[str(business["_id"])] = business.get("category")
+            builder.categories[business.get("slug")] = business.get("category")
+        fields = {"created_at": 1, "total_amount": 1, "status": 1, "customer_email": 1, "items": 1}
+        async for order in db.orders.find({}, fields).sort("created_at", 1).batch_size(SNAPSHOT_BATCH_SIZE):
+            builder.add(order)
+        return builder.finish()
+
+    # -- persistence --------------------------------------------------------
+
+    def save(self, directory: str = DEFAULT_SNAPSHOT_DIR):
+        os.makedirs(directory, exist_ok=True)
+        for name, column in self.columns.items():
+            np.save(os.path.join(directory, f"{name}.npy"), column)
+        with open(os.path.join(directory, "dictionaries.json"), "w") as f:
+            json.dump({
+                "products": self.products,
+                "businesses": self.businesses,
+                "categories": self.categories,
+                "customers": self.customers,
+                "statuses": self.statuses,
+            }, f)
+
+    @classmethod
+    def load(cls, directory: str = DEFAULT_SNAPSHOT_DIR, mmap: bool = True) -> "OrderSnapshot":
+        mode = "r" if mmap else None
+        columns = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode)
+            for name in ORDER_COLUMNS + ITEM_COLUMNS
+        }
+        with open(os.path.join(directory, "dictionaries.json")) as f:
+            dictionaries = json.load(f)
+        return cls(columns, dictionaries)
+
+    # -- selection ----------------------------------------------------------
+
+    def order_mask(self, start: Optional[datetime] = None, end: Optional[datetime] = None, statuses=REVENUE_STATUSES) -> np.ndarray:
+        allowed = np.array([status in statuses for status in self.statuses])
+        mask = allowed[self.order_status]
+        if start is not None:
+            mask &= self.order_ms >= to_ms(start)
+        if end is not None:
+            mask &= self.order_ms < to_ms(end)
+        return mask
+
+    def periods(self, ms: np.ndarray, period: str) -> np.ndarray:
+        """Buckets millisecond timestamps into day, week or month numbers."""
+        days = ms // MS_PER_DAY
+        if period == "day":
+            return days
+        if period == "week":
+            return (days + WEEK_OFFSET_DAYS) // 7
+        if period == "month":
+            return days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+        raise ValueError(f"Unknown period: {period}")
+
+    @staticmethod
+    def period_label(value: int, period: str) -> str:
+        if period == "day":
+            return str(np.datetime64(int(value), "D"))
+        if period == "week":
+            return str(np.datetime64(int(value) * 7 - WEEK_OFFSET_DAYS, "D"))
+        return str(np.datetime64(int(value), "M"))
+
+    # -- reports ------------------------------------------------------------
+
+    def revenue_by_period(self, period: str = "day", by: Optional[str] = None, **selection) -> List[Dict]:
+        """
+        Revenue (naira) per period, optionally split by "category", "business"
+        or "product". Order totals are used when not split, item amounts otherwise.
+        """
+        mask = self.order_mask(**selection)
+        if by is None:
+            keys, sums = group_sum(self.periods(self.order_ms[mask], period), self.order_kobo[mask])
+            return [{"period": self.period_label(k, period), "revenue": float(s) / 100} for k, s in zip(keys, sums)]
+
+        item_mask = mask[self.item_order]
+        labels = self._labels(by)
+        groups = self._item_group(by)[item_mask]
+        buckets = self.periods(self.order_ms[self.item_order[item_mask]], period)
+        # Pack (period, group) into one int64 key so a single pass does the group-by
+        keys, sums = group_sum(buckets * len(labels) + groups, self.item_kobo[item_mask])
+        return [
+            {"period": self.period_label(k // len(labels), period), by: labels[k % len(labels)], "revenue": float(s) / 100}
+            for k, s in zip(keys, sums)
+        ]
+
+    def top_k(self, by: str = "product", k: int = 5, metric: str = "units", **selection) -> List[Dict]:
+        item_mask = self.order_mask(**selection)[self.item_order]
+        labels = self._labels(by)
+        weights = self.item_quantity[item_mask] if metric == "units" else self.item_kobo[item_mask]
+        totals = np.bincount(self._item_group(by)[item_mask], weights=weights, minlength=len(labels))
+        k = min(k, int(np.count_nonzero(totals)))
+        if k == 0:
+            return []
+        top = np.argpartition(-totals, k - 1)[:k]
+        top = top[np.lexsort((top, -totals[top]))]
+        if metric == "units":
+            return [{"name": labels[i], "units": int(totals[i])} for i in top]
+        return [{"name": labels[i], "revenue": float(totals[i]) / 100} for i in top]
+
+    def rolling_revenue(self, window_days: int = 7, **selection) -> List[Dict]:
+        """Trailing window_days revenue for every day between the first and last order."""
+        mask = self.order_mask(**selection)
+        days = self.order_ms[mask] // MS_PER_DAY
+        if not len(days):
+            return []
+        first = int(days.min())
+        daily = np.bincount(days - first, weights=self.order_kobo[mask])
+        cumulative = np.concatenate(([0.0], np.cumsum(daily)))
+        window = cumulative[window_days:] - cumulative[:-window_days] if len(daily) >= window_days else np.array([])
+        # The first window_days - 1 days only have a partial window
+        partial = cumulative[1:min(window_days, len(daily) + 1)]
+        values = np.concatenate((partial, window))
+        return [{"date": self.period_label(first + i, "day"), "revenue": float(v) / 100} for i, v in enumerate(values)]
+
+    def cohort_revenue(self, period: str = "month", **selection) -> Dict:
+        """
+        Revenue matrix of customer cohort (period of first order) by order period.
+        Cohorts are taken over the whole snapshot, not just the selection.
+        """
+        all_periods = self.periods(self.order_ms, period)
+        first = np.full(len(self.customers), np.iinfo(np.int64).max, dtype=np.int64)
+        np.minimum.at(first, self.order_customer, all_periods)
+
+        mask = self.order_mask(**selection)
+        cohorts = first[self.order_customer[mask]]
+        periods = all_periods[mask]
+        cohort_keys, cohort_index = np.unique(cohorts, return_inverse=True)
+        period_keys, period_index = np.unique(periods, return_inverse=True)
+        matrix = np.zeros((len(cohort_keys), len(period_keys)), dtype=np.int64)
+        np.add.at(matrix, (cohort_index, period_index), self.order_kobo[mask])
+        return {
+            "cohorts": [self.period_label(c, period) for c in cohort_keys],
+            "periods": [self.period_label(p, period) for p in period_keys],
+            "revenue": (matrix / 100).tolist(),
+        }
+
+    def _labels(self, by: str) -> List[str]:
+        return {"product": self.products, "business": self.businesses, "category": self.categories}[by]
+
+    def _item_group(self, by: str) -> np.ndarray:
+        return {"product": self.item_product, "business": self.item_business, "category": self.item_category}[by]
+
+async def _snapshot(directory: str):
+    from database import get_database
+    snapshot = await OrderSnapshot.from_database(get_database())
+    snapshot.save(directory)
+    print(f"Saved {snapshot.order_count} orders / {snapshot.item_count} items to {directory}")
+
+def _report(directory: str, period: str, by: Optional[str]):
+    snapshot = OrderSnapshot.load(directory)
+    for row in snapshot.revenue_by_period(period, by):
+        print("  ".join(f"{value}" for value in row.values()))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Columnar order snapshot")
+    parser.add_argument("command", choices=["snapshot", "report"])
+    parser.add_argument("directory", nargs="?", default=DEFAULT_SNAPSHOT_DIR)
+    parser.add_argument("--period", choices=["day", "week", "month"], default="week")
+    parser.add_argument("--by", choices=["product", "business", "category"])
+    args = parser.parse_args()
+    if args.command == "snapshot":
+        asyncio.run(_snapshot(args.directory))
+    else:
+        _report(args.directory, args.period, args.by)
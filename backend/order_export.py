@@ -0,0 +1,111 @@
+"""
+Streams orders out of a Motor cursor as NDJSON or CSV.
+
+Only one cursor batch and one output chunk are held at a time, so memory
+stays flat regardless of how many orders are exported.
+"""
+import io
+import os
+import csv
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+
+from serialization import dumps, to_public
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+EXPORT_SORT = [("created_at", 1), ("_id", 1)]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+# One CSV row per order item, which is what accounting imports expect
+CSV_COLUMNS = [
+    "order_id", "created_at", "status", "customer_name", "customer_email", "customer_phone",
+    "payment_method", "order_total", "business_id", "business_name", "product_code",
+    "product_name", "quantity", "unit_price", "line_total",
+]
+
+# Spreadsheets evaluate cells starting with these as formulas
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+def safe_cell(value):
+    """Quotes customer-controlled text that Excel or Sheets would run as a formula."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+def filename(prefix: str, fmt: str) -> str:
+    return f"{prefix}-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+
+def _own_items(order: Dict, business_ids: Optional[set]) -> Dict:
+    if business_ids is not None:
+        order["items"] = [item for item in order.get("items", []) if item.get("business_id") in business_ids]
+    return order
+
+def _csv_rows(order: Dict) -> Iterable[List]:
+    created_at = order.get("created_at")
+    base = [
+        order["id"],
+        created_at.isoformat() if isinstance(created_at, datetime) else created_at,
+        order.get("status"),
+        order.get("customer_name"),
+        order.get("customer_email"),
+        order.get("customer_phone"),
+        order.get("payment_method"),
+        order.get("total_amount"),
+    ]
+    for item in order.get("items", []):
+        quantity = item.get("quantity", 1)
+        yield base + [
+            item.get("business_id"),
+            item.get("business_name"),
+            item.get("code"),
+            item.get("name"),
+            quantity,
+            item.get("price"),
+            item.get("line_total", (item.get("price") or 0) * quantity),
+        ]
+
+async def stream(cursor, fmt: str, business_ids: Optional[Iterable[str]] = None) -> AsyncIterator[bytes]:
+    """
+    Yields the export in chunks of up to EXPORT_BATCH_SIZE orders. With
+    business_ids, each order keeps only the items of those businesses.
+    """
+    owned = set(business_ids) if business_ids is not None else None
+    cursor.batch_size(EXPORT_BATCH_SIZE)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    chunk: List[bytes] = []
+    pending = 0
+    started = False
+
+    if fmt == "csv":
+        # Send the header straight away so the download starts before the first batch
+        writer.writerow(CSV_COLUMNS)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+    async for order in cursor:
+        order = _own_items(to_public(order), owned)
+        if fmt == "csv":
+            writer.writerows([safe_cell(cell) for cell in row] for row in _csv_rows(order))
+        else:
+            chunk.append(dumps(order))
+        pending += 1
+        # The first order goes out on its own so clients see data immediately
+        if pending >= EXPORT_BATCH_SIZE or not started:
+            yield _drain(fmt, chunk, buffer)
+            pending = 0
+            started = True
+    if pending:
+        yield _drain(fmt, chunk, buffer)
+
+def _drain(fmt: str, chunk: List[bytes], buffer: io.StringIO) -> bytes:
+    if fmt == "csv":
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+    data = b"\n".join(chunk) + b"\n"
+    chunk.clear()
+    return data
@@ -0,0 +1,77 @@
+"""
+Time-sortable, collision-free order IDs.
+
+Layout after the "ORD-" prefix, all in Crockford base32 (fixed width):
+    10 chars  milliseconds since the Unix epoch (48 bits)
+     3 chars  worker ID (15 bits), from ORDER_WORKER_ID or host + pid
+     4 chars  per-millisecond sequence (20 bits)
+
+IDs from one process are strictly increasing, and IDs from any process sort
+by creation time. Legacy "ORD-<unix seconds>" IDs do not share this ordering.
+"""
+import os
+import random
+import socket
+import threading
+import time
+import zlib
+
+PREFIX = "ORD-"
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+TIME_CHARS, WORKER_CHARS, SEQUENCE_CHARS = 10, 3, 4
+WORKER_BITS, SEQUENCE_BITS = 15, 20
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+def _encode(value: int, width: int) -> str:
+    chars = []
+    for _ in range(width):
+        value, rem = divmod(value, 32)
+        chars.append(ALPHABET[rem])
+    return "".join(reversed(chars))
+
+def _default_worker_id() -> int:
+    # An empty value (as in .env.example) means unset
+    configured = os.getenv("ORDER_WORKER_ID", "").strip()
+    if configured:
+        try:
+            return int(configured) % (1 << WORKER_BITS)
+        except ValueError:
+            print(f"WARNING: Ignoring non-numeric ORDER_WORKER_ID {configured!r}, deriving one from host and pid")
+    return zlib.crc32(f"{socket.gethostname()}:{os.getpid()}".encode()) % (1 << WORKER_BITS)
+
+class OrderIdGenerator:
+    def __init__(self, worker_id: int = None):
+        self._fixed_worker_id = worker_id
+        self._lock = threading.Lock()
+        self._pid = None
+        self._worker = ""
+        self._last_ms = 0
+        self._sequence = 0
+
+    def new_id(self) -> str:
+        with self._lock:
+            if self._pid != os.getpid():
+                # Re-derive after fork so sibling workers don't share an ID
+                self._pid = os.getpid()
+                worker_id = self._fixed_worker_id if self._fixed_worker_id is not None else _default_worker_id()
+                self._worker = _encode(worker_id, WORKER_CHARS)
+                self._last_ms = 0
+
+            now_ms = int(time.time() * 1000)
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                # Random start within the lower half leaves room to increment and
+                # makes clashes unlikely even if two hosts derive the same worker ID
+                self._sequence = random.getrandbits(SEQUENCE_BITS - 1)
+            else:
+                # Same millisecond or clock moved backwards: stay monotonic
+                self._sequence += 1
+                if self._sequence > MAX_SEQUENCE:
+                    self._last_ms += 1
+                    self._sequence = 0
+            return f"{PREFIX}{_encode(self._last_ms, TIME_CHARS)}{self._worker}{_encode(self._sequence, SEQUENCE_CHARS)}"
+
+_generator = OrderIdGenerator()
+
+def new_order_id() -> str:
+    return _generator.new_id()
@@ -0,0 +1,79 @@
+"""
+Filters, projection and keyset cursors for browsing the orders collection.
+
+Orders are listed newest first on (created_at, _id); both are part of every
+listing index in indexes.py so a page is a bounded index range scan.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from serialization import naive_utc
+
+SORT = [("created_at", -1), ("_id", -1)]
+EPOCH = datetime(1970, 1, 1)
+
+# List views carry an item count instead of the item array
+LIST_PROJECTION = {
+    "customer_name": 1,
+    "customer_email": 1,
+    "customer_phone": 1,
+    "total_amount": 1,
+    "payment_method": 1,
+    "status": 1,
+    "created_at": 1,
+    "updated_at": 1,
+    "business_ids": 1,
+    "item_count": {"$sum": "$items.quantity"},
+}
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(order: Dict) -> str:
+    millis = (order["created_at"] - EPOCH) // timedelta(milliseconds=1)
+    return f"{millis}.{order['_id']}"
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    millis, _, order_id = cursor.partition(".")
+    try:
+        created_at = EPOCH + timedelta(milliseconds=int(millis))
+    except (ValueError, OverflowError):
+        raise InvalidCursor(cursor)
+    if not order_id:
+        raise InvalidCursor(cursor)
+    return created_at, order_id
+
+def build_filter(
+    status: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    customer_email: Optional[str] = None,
+    customer_phone: Optional[str] = None,
+    business_id: Optional[str] = None,
+    after: Optional[str] = None,
+) -> Dict:
+    """Equality filters first, then the created_at range, matching the index key order."""
+    query: Dict = {}
+    if status:
+        query["status"] = status
+    if customer_email:
+        query["customer_email"] = customer_email.strip()
+    if customer_phone:
+        query["customer_phone"] = customer_phone.strip()
+    if business_id:
+        query["business_ids"] = business_id
+    created: Dict = {}
+    if start:
+        created["$gte"] = naive_utc(start)
+    if end:
+        created["$lt"] = naive_utc(end)
+    if created:
+        query["created_at"] = created
+    if after:
+        created_at, order_id = decode_cursor(after)
+        keyset = {"$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": order_id}},
+        ]}
+        query = {"$and": [query, keyset]} if query else keyset
+    return query
@@ -0,0 +1,139 @@
+import os
+import time
+import random
+import asyncio
+from typing import Dict, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PAYSTACK_SECRET_KEY = os.getenv("PAYSTACK_SECRET_KEY", "sk_test_placeholder")
+# Point this at fake_paystack.py for tests and load runs
+PAYSTACK_API_URL = os.getenv("PAYSTACK_API_URL", "https://api.paystack.co")
+
+PAYSTACK_CONNECT_TIMEOUT = float(os.getenv("PAYSTACK_CONNECT_TIMEOUT", "3"))
+PAYSTACK_READ_TIMEOUT = float(os.getenv("PAYSTACK_READ_TIMEOUT", "10"))
+PAYSTACK_MAX_RETRIES = int(os.getenv("PAYSTACK_MAX_RETRIES", "2"))
+RETRY_BASE_DELAY = 0.2
+
+# Consecutive failures that open the circuit, and how long it stays open
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("PAYSTACK_BREAKER_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("PAYSTACK_BREAKER_RESET_SECONDS", "30"))
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+class PaystackError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+class CircuitBreaker:
+    """
+    Fails fast after repeated Paystack failures. After reset_seconds one
+    trial request is let through; success closes the circuit again.
+    """
+
+    def __init__(self, threshold: int = BREAKER_FAILURE_THRESHOLD, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "half-open":
+            # Let a single trial through; further calls wait for its outcome
+            self.opened_at = time.monotonic()
+            return True
+        return state == "closed"
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+class PaystackClient:
+    """Async Paystack API client sharing one keep-alive connection pool."""
+
+    def __init__(self, base_url: str = PAYSTACK_API_URL, secret_key: str = PAYSTACK_SECRET_KEY):
+        self.base_url = base_url
+        self.secret_key = secret_key
+        self.breaker = CircuitBreaker()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.secret_key}", "Content-Type": "application/json"},
+                timeout=httpx.Timeout(PAYSTACK_READ_TIMEOUT, connect=PAYSTACK_CONNECT_TIMEOUT),
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+            )
+        return self._client
+
+    async def _request(self, method: str, path: str, payload: Optional[Dict] = None, idempotent: bool = True) -> Dict:
+        """
+        Sends one API call. Connection failures are always retried, since the
+        request never left this process; timeouts and 5xx responses are only
+        retried for idempotent calls, as Paystack may already have acted on them.
+        """
+        if not self.breaker.allow():
+            raise PaystackError(503, "Payment provider temporarily unavailable")
+
+        last_error = PaystackError(502, "Paystack request failed")
+        for attempt in range(PAYSTACK_MAX_RETRIES + 1):
+            if attempt:
+                # Exponential backoff with full jitter
+                await asyncio.sleep(random.uniform(0, RETRY_BASE_DELAY * (2 ** attempt)))
+            try:
+                response = await self._http().request(method, path, json=payload)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                last_error = PaystackError(502, f"Could not reach Paystack: {e}")
+                continue
+            except httpx.TimeoutException:
+                last_error = PaystackError(504, "Paystack request timed out")
+            except httpx.TransportError as e:
+                last_error = PaystackError(502, f"Could not reach Paystack: {e}")
+            else:
+                if response.status_code not in RETRYABLE_STATUS:
+                    self.breaker.record_success()
+                    if not response.is_success:
+                        # Client errors (bad key, invalid payload) are not retried
+                        raise PaystackError(response.status_code, response.text)
+                    return response.json()
+                last_error = PaystackError(response.status_code, response.text)
+            if not idempotent:
+                break
+
+        self.breaker.record_failure()
+        raise last_error
+
+    async def initialize_transaction(self, payload: Dict) -> Dict:
+        # Not idempotent: repeating it with the same reference after a timeout
+        # gets "Duplicate Transaction Reference" even though the first one worked
+        return await self._request("POST", "/transaction/initialize", payload, idempotent=False)
+
+    async def verify_transaction(self, reference: str) -> Dict:
+        return await self._request("GET", f"/transaction/verify/{reference}")
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+paystack = PaystackClient()
@@ -0,0 +1,110 @@
+from typing import Dict, List, Optional
+
+from catalog_cache import is_addressable, is_approved
+from product_index import normalize_code, normalize_whatsapp_id
+
+# Prices are compared after rounding to kobo, so float noise never flags a cart as stale
+PRICE_DECIMALS = 2
+
+def _money(value) -> float:
+    return round(float(value), PRICE_DECIMALS)
+
+class PriceIndex:
+    """
+    Current price of every purchasable product, keyed by business and code.
+    Kept in step with catalog writes as a catalog_cache listener, so pricing
+    a cart never queries MongoDB.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Dict[str, Dict]] = {}
+        self._slugs: Dict[str, str] = {}
+
+    def rebuild(self, businesses: List[Dict]):
+        self.__init__()
+        for business in businesses:
+            self.index_business(business)
+
+    def index_business(self, business: Dict):
+        business_id = str(business["_id"])
+        self.remove_business(business_id)
+        if not is_approved(business) or not is_addressable(business):
+            return
+        entries = {}
+        for product in business.get("products", []):
+            if not product.get("code") or product.get("price") is None:
+                continue
+            entries[normalize_code(product["code"])] = {
+                "code": product["code"],
+                "name": product.get("name", product["code"]),
+                "price": _money(product["price"]),
+                "business_id": business_id,
+                "business_name": business.get("name"),
+                "business_slug": business.get("slug"),
+            }
+        self._entries[business_id] = entries
+        self._slugs[business.get("slug")] = business_id
+
+    def remove_business(self, business_id: str):
+        if self._entries.pop(str(business_id), None) is None:
+            return
+        for slug, owner in list(self._slugs.items()):
+            if owner == str(business_id):
+                del self._slugs[slug]
+
+    def lookup(self, code: str, business_id: Optional[str] = None, business_slug: Optional[str] = None) -> Optional[Dict]:
+        if not business_id:
+            business_id = self._slugs.get(business_slug or "")
+        return self._entries.get(business_id or "", {}).get(normalize_code(code))
+
+    def quote(self, items: List[Dict], synced: Optional[Dict[str, Dict]] = None) -> Dict:
+        """
+        Prices a cart in one pass. Each item needs code, quantity and
+        business_id or business_slug; a submitted "price" is compared with
+        the current one to report stale lines. Sync Station products that
+        aren't in the catalog are priced from synced, keyed by WhatsApp ID
+        (see synced_entry).
+        """
+        synced = synced or {}
+        lines, unavailable, changed = [], [], []
+        total = 0.0
+        for item in items:
+            quantity = int(item.get("quantity") or 0)
+            entry = self.lookup(item.get("code"), item.get("business_id"), item.get("business_slug"))
+            if entry is None and item.get("auto_synced"):
+                entry = synced.get(normalize_whatsapp_id(item.get("whatsapp_id")))
+            if entry is None or quantity < 1:
+                unavailable.append({"code": item.get("code"), "name": item.get("name"), "business_slug": item.get("business_slug")})
+                continue
+            line_total = _money(entry["price"] * quantity)
+            total += line_total
+            line = dict(entry, whatsapp_id=item.get("whatsapp_id"), quantity=quantity, line_total=line_total)
+            lines.append(line)
+            submitted = item.get("price")
+            if submitted is not None and _money(submitted) != entry["price"]:
+                changed.append({"code": entry["code"], "business_slug": entry["business_slug"], "submitted_price": _money(submitted), "price": entry["price"]})
+        return {
+            "items": lines,
+            "total_amount": _money(total),
+            "unavailable": unavailable,
+            "changed": changed,
+        }
+
+def synced_entry(product: Optional[Dict]) -> Optional[Dict]:
+    """
+    Price entry for a product scraped from WhatsApp, or None if it can't be
+    sold: the page is gone or showed no price.
+    """
+    if not product or not product.get("price"):
+        return None
+    return {
+        "code": product.get("code"),
+        "name": product.get("name"),
+        "price": _money(product["price"]),
+        # Not a catalog business, so no id; orders and rollups fall back to the slug
+        "business_id": None,
+        "business_name": product.get("business_name"),
+        "business_slug": product.get("business_slug"),
+    }
+
+price_index = PriceIndex()
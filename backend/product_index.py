@@ -0,0 +1,78 @@
+from typing import Dict, List, Optional
+
+import data_manager
+from catalog_cache import is_addressable
+
+def normalize_code(code) -> str:
+    return str(code or "").lower().strip()
+
+def normalize_whatsapp_id(whatsapp_id) -> str:
+    return data_manager.extract_whatsapp_id(str(whatsapp_id or "")) if whatsapp_id else ""
+
+def sync_payload(product: Dict, business: Dict) -> Dict:
+    """Shape returned by the Sync Station for a catalog product."""
+    return {
+        "code": product.get("code"),
+        "whatsapp_id": product.get("whatsapp_id"),
+        "name": product.get("name"),
+        "price": product.get("price"),
+        "description": product.get("description"),
+        "image": product.get("image"),
+        "business_name": business.get("name"),
+        "business_slug": business.get("slug"),
+    }
+
+class ProductIndex:
+    """
+    Hash index resolving a product by case-insensitive code or by WhatsApp ID.
+    Each key maps business_id -> payload, since codes are only unique per business.
+    """
+
+    def __init__(self):
+        self._by_code: Dict[str, Dict[str, Dict]] = {}
+        self._by_whatsapp_id: Dict[str, Dict[str, Dict]] = {}
+        self._keys: Dict[str, List] = {}
+
+    def rebuild(self, businesses: List[Dict]):
+        self.__init__()
+        for business in businesses:
+            self.index_business(business)
+
+    def index_business(self, business: Dict):
+        business_id = str(business["_id"])
+        self.remove_business(business_id)
+        if not is_addressable(business):
+            return
+        keys = []
+        for product in business.get("products", []):
+            if not product.get("code") or "name" not in product or product.get("price") is None:
+                continue
+            payload = sync_payload(product, business)
+            code = normalize_code(product["code"])
+            self._by_code.setdefault(code, {})[business_id] = payload
+            keys.append((self._by_code, code))
+            whatsapp_id = normalize_whatsapp_id(product.get("whatsapp_id"))
+            if whatsapp_id:
+                self._by_whatsapp_id.setdefault(whatsapp_id, {})[business_id] = payload
+                keys.append((self._by_whatsapp_id, whatsapp_id))
+        self._keys[business_id] = keys
+
+    def remove_business(self, business_id: str):
+        for table, key in self._keys.pop(str(business_id), []):
+            matches = table.get(key)
+            if matches is None:
+                continue
+            matches.pop(str(business_id), None)
+            if not matches:
+                del table[key]
+
+    def resolve(self, identifier: str) -> Optional[Dict]:
+        """Looks up a sync code, WhatsApp ID or WhatsApp product link."""
+        matches = self._by_code.get(normalize_code(identifier))
+        if not matches:
+            matches = self._by_whatsapp_id.get(normalize_whatsapp_id(identifier))
+        if not matches:
+            return None
+        return dict(next(iter(matches.values())))
+
+product_index = ProductIndex()
@@ -0,0 +1,165 @@
+"""
+Daily sales rollups maintained incrementally from order status changes.
+
+sales_daily holds one row per (day, business_id, product_code) with units,
+revenue and order counts split by order status, plus one row per
+(day, business_id) with product_code None for business-level totals.
+sales_daily_orders counts orders per (day, basket), where the basket is
+the set of businesses an order bought from, so a merchant's order total
+counts an order spanning several of their businesses once.
+Dashboards read these rows instead of scanning orders.
+
+Each order records the status it was last rolled up under
+(rollup_status), so replays of the same transition are no-ops.
+
+Rebuild from the orders collection (pause checkout traffic while it runs):
+    python rollups.py --rebuild
+"""
+import sys
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List
+
+from pymongo import UpdateOne, ReturnDocument
+
+from webhook_queue import EVENT_STATUS
+from analytics_cache import analytics_cache
+
+STATUSES = ("pending", "completed", "failed")
+ROLLUP_FIELDS = {"created_at": 1, "items": 1, "rollup_status": 1}
+REBUILD_BATCH_SIZE = 1000
+
+def day_of(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, moment.day)
+
+def business_key(item: Dict) -> str:
+    # Items from before business_id was stamped on orders fall back to the slug
+    return item.get("business_id") or item.get("business_slug") or item.get("business_name") or ""
+
+def order_deltas(order: Dict, status: str, sign: int) -> Dict[tuple, Dict]:
+    """Per-row counters one order contributes under status, scaled by sign (+1 / -1)."""
+    day = day_of(order.get("created_at") or datetime.utcnow())
+    rows: Dict[tuple, Dict] = {}
+    for item in order.get("items", []):
+        quantity = item.get("quantity", 1)
+        revenue = item.get("price", 0) * quantity
+        business = business_key(item)
+        for code in (item.get("code"), None):
+            key = (day, business, code)
+            row = rows.setdefault(key, {
+                "names": {"business_name": item.get("business_name"), "business_slug": item.get("business_slug")},
+                "inc": defaultdict(int),
+            })
+            if code is not None:
+                row["names"]["product_name"] = item.get("name")
+            row["inc"][f"{status}.units"] += sign * quantity
+            row["inc"][f"{status}.revenue"] += sign * revenue
+    for row in rows.values():
+        # Every row counts the order once, even when it holds several lines of that product
+        row["inc"][f"{status}.orders"] += sign
+    return rows
+
+def basket_deltas(order: Dict, status: str, sign: int) -> Dict[tuple, Dict]:
+    """The order's count in its (day, basket) row, scaled by sign."""
+    business_ids = sorted({business_key(item) for item in order.get("items", [])})
+    if not business_ids:
+        return {}
+    day = day_of(order.get("created_at") or datetime.utcnow())
+    inc = defaultdict(int)
+    inc[f"{status}.orders"] += sign
+    return {(day, "|".join(business_ids)): {"names": {"business_ids": business_ids}, "inc": inc}}
+
+def merge(into: Dict[tuple, Dict], rows: Dict[tuple, Dict]):
+    for key, row in rows.items():
+        target = into.setdefault(key, {"names": {}, "inc": defaultdict(int)})
+        target["names"].update({k: v for k, v in row["names"].items() if v is not None})
+        for field, value in row["inc"].items():
+            target["inc"][field] += value
+
+def to_operations(rows: Dict[tuple, Dict]) -> List[UpdateOne]:
+    operations = []
+    for (day, business, code), row in rows.items():
+        operations.append(UpdateOne(
+            {"day": day, "business_id": business, "product_code": code},
+            {"$inc": dict(row["inc"]), "$set": row["names"]},
+            upsert=True,
+        ))
+    return operations
+
+def basket_operations(rows: Dict[tuple, Dict]) -> List[UpdateOne]:
+    return [
+        UpdateOne({"day": day, "basket": basket}, {"$inc": dict(row["inc"]), "$set": row["names"]}, upsert=True)
+        for (day, basket), row in rows.items()
+    ]
+
+async def sync_order(db, order_id: str, status: str):
+    """
+    Moves an order's contribution to status if it now has that status and
+    was last rolled up under a different one.
+    """
+    try:
+        before = await db.orders.find_one_and_update(
+            {"_id": order_id, "status": status, "rollup_status": {"$ne": status}},
+            {"$set": {"rollup_status": status}},
+            projection=ROLLUP_FIELDS,
+            return_document=ReturnDocument.BEFORE,
+        )
+        if before is None:
+            return
+        rows = order_deltas(before, status, 1)
+        baskets = basket_deltas(before, status, 1)
+        previous = before.get("rollup_status")
+        if previous in STATUSES:
+            merge(rows, order_deltas(before, previous, -1))
+            merge(baskets, basket_deltas(before, previous, -1))
+        await db.sales_daily.bulk_write(to_operations(rows), ordered=False)
+        if baskets:
+            await db.sales_daily_orders.bulk_write(basket_operations(baskets), ordered=False)
+        analytics_cache.invalidate({business for (_, business, _) in rows})
+    except Exception as e:
+        print(f"WARNING: Sales rollup for order {order_id} failed: {e}")
+
+async def on_webhook_batch(db, events: List[Dict]):
+    """webhook_queue callback: rolls up orders whose status the batch changed."""
+    for event in events:
+        status = EVENT_STATUS.get(event.get("event"))
+        if status and event.get("reference"):
+            await sync_order(db, event["reference"], status)
+
+async def rebuild(db):
+    """Recomputes sales_daily from every order and resets rollup_status."""
+    await db.sales_daily.delete_many({})
+    await db.sales_daily_orders.delete_many({})
+    rows: Dict[tuple, Dict] = {}
+    baskets: Dict[tuple, Dict] = {}
+    marks: Dict[str, List[str]] = defaultdict(list)
+    count = 0
+    async for order in db.orders.find({}, {"status": 1, **ROLLUP_FIELDS}):
+        status = order.get("status")
+        if status in STATUSES:
+            merge(rows, order_deltas(order, status, 1))
+            merge(baskets, basket_deltas(order, status, 1))
+            marks[status].append(order["_id"])
+        count += 1
+    operations = to_operations(rows)
+    for start in range(0, len(operations), REBUILD_BATCH_SIZE):
+        await db.sales_daily.bulk_write(operations[start:start + REBUILD_BATCH_SIZE], ordered=False)
+    basket_ops = basket_operations(baskets)
+    for start in range(0, len(basket_ops), REBUILD_BATCH_SIZE):
+        await db.sales_daily_orders.bulk_write(basket_ops[start:start + REBUILD_BATCH_SIZE], ordered=False)
+    await db.orders.update_many({}, {"$unset": {"rollup_status": ""}})
+    for status, ids in marks.items():
+        for start in range(0, len(ids), REBUILD_BATCH_SIZE):
+            await db.orders.update_many({"_id": {"$in": ids[start:start + REBUILD_BATCH_SIZE]}}, {"$set": {"rollup_status": status}})
+    print(f"Rolled up {count} orders into {len(operations)} sales_daily rows.")
+
+async def main():
+    from database import get_database
+    await rebuild(get_database())
+
+if __name__ == "__main__":
+    if "--rebuild" not in sys.argv:
+        print(__doc__)
+        sys.exit(1)
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+import os
+import asyncio
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from product_index import normalize_whatsapp_id
+from whatsapp_scraper import whatsapp_scraper
+
+# Successful scrapes are kept for a week and considered stale after a day;
+# failures (invalid or removed links) are remembered briefly
+SCRAPE_CACHE_TTL = float(os.getenv("SCRAPE_CACHE_TTL", str(7 * 24 * 3600)))
+SCRAPE_STALE_AFTER = float(os.getenv("SCRAPE_STALE_AFTER", str(24 * 3600)))
+SCRAPE_NEGATIVE_TTL = float(os.getenv("SCRAPE_NEGATIVE_TTL", "300"))
+SCRAPE_CACHE_MAX_ENTRIES = int(os.getenv("SCRAPE_CACHE_MAX_ENTRIES", "5000"))
+
+class ScrapeCache:
+    """
+    Scraped WhatsApp products keyed by normalized WhatsApp ID. An in-memory
+    LRU sits in front of the scrape_cache collection, whose TTL index on
+    expires_at lets entries survive restarts and be shared between machines.
+    A product of None records a failed scrape (negative entry).
+    """
+
+    def __init__(self, max_entries: int = SCRAPE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.negative_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def _remember(self, entry: Dict):
+        self._entries[entry["_id"]] = entry
+        self._entries.move_to_end(entry["_id"])
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def _load(self, db, key: str) -> Optional[Dict]:
+        now = datetime.utcnow()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry["expires_at"] > now:
+                self._entries.move_to_end(key)
+                return entry
+            del self._entries[key]
+        # The TTL monitor only runs every minute, so expiry is checked here too
+        entry = await db.scrape_cache.find_one({"_id": key, "expires_at": {"$gt": now}})
+        if entry is not None:
+            self._remember(entry)
+        return entry
+
+    async def _scrape(self, db, key: str, url: str, keep_existing: bool = False) -> Dict:
+        product = await whatsapp_scraper.scrape(url)
+        if product is None and keep_existing:
+            existing = self._entries.get(key) or await db.scrape_cache.find_one({"_id": key})
+            if existing is not None and existing.get("product") is not None:
+                # A failed revalidation doesn't throw away a good result; it still expires on schedule
+                return existing
+        now = datetime.utcnow()
+        ttl = SCRAPE_CACHE_TTL if product is not None else SCRAPE_NEGATIVE_TTL
+        entry = {"_id": key, "product": product, "fetched_at": now, "expires_at": now + timedelta(seconds=ttl)}
+        await db.scrape_cache.replace_one({"_id": key}, entry, upsert=True)
+        self._remember(entry)
+        return entry
+
+    async def _scrape_once(self, db, key: str, url: str, keep_existing: bool = False) -> Dict:
+        """Concurrent scrapes of the same product share one request."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._scrape(db, key, url, keep_existing))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def lookup(self, db, url: str, refresh: bool = False) -> Tuple[Optional[Dict], Dict]:
+        """
+        Returns (product or None, metadata). metadata["status"] is "hit",
+        "stale", "miss" or "refreshed"; a stale result should be revalidated
+        by calling again with refresh=True.
+        """
+        key = normalize_whatsapp_id(url)
+        if refresh:
+            entry = await self._scrape_once(db, key, url, keep_existing=True)
+            status = "refreshed"
+        else:
+            entry = await self._load(db, key)
+            if entry is None:
+                self.misses += 1
+                entry = await self._scrape_once(db, key, url)
+                status = "miss"
+            elif entry["product"] is None:
+                self.negative_hits += 1
+                status = "hit"
+            elif (datetime.utcnow() - entry["fetched_at"]).total_seconds() > SCRAPE_STALE_AFTER:
+                self.stale_hits += 1
+                status = "stale"
+            else:
+                self.hits += 1
+                status = "hit"
+        age = max((datetime.utcnow() - entry["fetched_at"]).total_seconds(), 0)
+        return entry["product"], {"status": status, "fetched_at": entry["fetched_at"], "age_seconds": int(age)}
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.negative_hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round((lookups - self.misses) / lookups, 4) if lookups else 0.0,
+        }
+
+scrape_cache = ScrapeCache()
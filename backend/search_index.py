@@ -0,0 +1,190 @@
+import re
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from catalog_cache import is_approved
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Field weights used when scoring a hit. A match in a name or product code
+# is worth more than one buried in a description.
+BUSINESS_FIELDS = {"name": 3.0, "category": 2.0, "description": 1.0}
+PRODUCT_FIELDS = {"name": 3.0, "code": 3.0, "description": 1.0}
+
+# Query tokens that only match as a prefix (e.g. "hon" -> "honey") score lower
+# than exact token matches.
+PREFIX_WEIGHT = 0.5
+
+KINDS = ("products", "businesses")
+
+def tokenize(text) -> List[str]:
+    """Lowercases text and splits it into alphanumeric tokens."""
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+def _category_field(kind: str) -> str:
+    return "category" if kind == "businesses" else "business_category"
+
+class SearchIndex:
+    """
+    Inverted index over approved businesses and their embedded products.
+    Postings map token -> {doc_key: weight} per kind, and a sorted vocabulary
+    per kind allows prefix expansion for search-as-you-type.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self._postings = {kind: defaultdict(dict) for kind in KINDS}
+        self._vocab = {kind: [] for kind in KINDS}
+        self._docs = {kind: {} for kind in KINDS}
+        # business_id -> [(kind, doc_key, tokens)] so a business can be reindexed in place
+        self._owned = {}
+        # (kind, category) -> doc keys in name order, for empty-query browsing;
+        # built on first use and dropped whenever the index changes
+        self._default_order = {}
+
+    def rebuild(self, businesses: List[Dict]):
+        """Replaces the whole index with the given business documents."""
+        self.__init__()
+        for business in businesses:
+            self.index_business(business)
+        for kind in KINDS:
+            self._browse_order(kind, None)
+        self.loaded = True
+
+    def index_business(self, business: Dict):
+        """(Re)indexes a single business and its products."""
+        business_id = str(business["_id"])
+        self.remove_business(business_id)
+        self._default_order.clear()
+        if not is_approved(business):
+            return
+
+        products = business.get("products", [])
+        entries = []
+
+        biz_payload = {k: v for k, v in business.items() if k not in ("_id", "products")}
+        biz_payload["id"] = business_id
+        biz_payload["product_count"] = len(products)
+        entries.append(("businesses", business_id, biz_payload, self._weigh(business, BUSINESS_FIELDS)))
+
+        for product in products:
+            doc_key = f"{business_id}:{product.get('code')}"
+            payload = dict(product)
+            payload["business_id"] = business_id
+            payload["business_name"] = business.get("name")
+            payload["business_slug"] = business.get("slug")
+            payload["business_category"] = business.get("category")
+            entries.append(("products", doc_key, payload, self._weigh(product, PRODUCT_FIELDS)))
+
+        owned = []
+        for kind, doc_key, payload, weights in entries:
+            self._docs[kind][doc_key] = payload
+            for token, weight in weights.items():
+                postings = self._postings[kind]
+                if token not in postings:
+                    insort(self._vocab[kind], token)
+                postings[token][doc_key] = weight
+            owned.append((kind, doc_key, list(weights)))
+        self._owned[business_id] = owned
+
+    def remove_business(self, business_id: str):
+        """Drops a business and all of its products from the index."""
+        if str(business_id) in self._owned:
+            self._default_order.clear()
+        for kind, doc_key, tokens in self._owned.pop(str(business_id), []):
+            self._docs[kind].pop(doc_key, None)
+            postings = self._postings[kind]
+            for token in tokens:
+                docs = postings.get(token)
+                if docs is None:
+                    continue
+                docs.pop(doc_key, None)
+                if not docs:
+                    del postings[token]
+                    vocab = self._vocab[kind]
+                    pos = bisect_left(vocab, token)
+                    if pos < len(vocab) and vocab[pos] == token:
+                        vocab.pop(pos)
+
+    def search(self, query: str, kind: str = "products", limit: int = 20, offset: int = 0, category: Optional[str] = None) -> Dict:
+        """
+        Returns ranked hits for the query. Every query token must match
+        (AND semantics); the last token also matches as a prefix.
+        """
+        tokens = tokenize(query)
+        docs = self._docs[kind]
+
+        if not tokens:
+            # Browsing: name order, precomputed, so a page is just a slice
+            return self._page(docs, self._browse_order(kind, category), offset, limit)
+
+        scores = None
+        for i, token in enumerate(tokens):
+            token_scores = self._match(kind, token, prefix=(i == len(tokens) - 1))
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {k: s + token_scores[k] for k, s in scores.items() if k in token_scores}
+            if not scores:
+                break
+        scores = scores or {}
+
+        if category:
+            category_field = _category_field(kind)
+            scores = {k: s for k, s in scores.items() if docs[k].get(category_field) == category}
+
+        ranked = sorted(scores, key=lambda k: (-scores[k], str(docs[k].get("name", "")).lower(), k))
+        return self._page(docs, ranked, offset, limit)
+
+    @staticmethod
+    def _page(docs: Dict, ordered: List[str], offset: int, limit: int) -> Dict:
+        next_offset = offset + limit
+        return {
+            "results": [docs[doc_key] for doc_key in ordered[offset:next_offset]],
+            "total": len(ordered),
+            "next_cursor": str(next_offset) if next_offset < len(ordered) else None,
+        }
+
+    def _browse_order(self, kind: str, category: Optional[str]) -> List[str]:
+        """Doc keys sorted by name (the empty-query ranking), cached per category."""
+        ordered = self._default_order.get((kind, category))
+        if ordered is None:
+            docs = self._docs[kind]
+            if category:
+                category_field = _category_field(kind)
+                keys = [k for k, doc in docs.items() if doc.get(category_field) == category]
+            else:
+                keys = list(docs)
+            ordered = sorted(keys, key=lambda k: (str(docs[k].get("name", "")).lower(), k))
+            self._default_order[(kind, category)] = ordered
+        return ordered
+
+    def _match(self, kind: str, token: str, prefix: bool) -> Dict[str, float]:
+        postings = self._postings[kind]
+        matched = dict(postings.get(token, {}))
+        if prefix:
+            vocab = self._vocab[kind]
+            pos = bisect_left(vocab, token)
+            while pos < len(vocab) and vocab[pos].startswith(token):
+                candidate = vocab[pos]
+                pos += 1
+                if candidate == token:
+                    continue
+                for doc_key, weight in postings[candidate].items():
+                    weight *= PREFIX_WEIGHT
+                    if weight > matched.get(doc_key, 0.0):
+                        matched[doc_key] = weight
+        return matched
+
+    @staticmethod
+    def _weigh(doc: Dict, fields: Dict[str, float]) -> Dict[str, float]:
+        weights = defaultdict(float)
+        for field, field_weight in fields.items():
+            for token in tokenize(doc.get(field)):
+                weights[token] += field_weight
+        return weights
+
+catalog_index = SearchIndex()
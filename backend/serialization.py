@@ -0,0 +1,41 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+import orjson
+from bson import ObjectId
+from starlette.responses import JSONResponse
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def dumps(obj: Any) -> bytes:
+    """Serializes straight to JSON bytes. datetimes are emitted in ISO 8601."""
+    return orjson.dumps(obj, default=_default)
+
+def naive_utc(moment: datetime) -> datetime:
+    """
+    Converts a datetime to the naive UTC that documents store. Aware values
+    are shifted to UTC first; naive ones are taken to be UTC already.
+    """
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+def to_public(doc: Dict) -> Dict:
+    """Renames a document's _id to a string id, in place. Nested documents carry no _id."""
+    if doc and "_id" in doc:
+        doc["id"] = str(doc.pop("_id"))
+    return doc
+
+def to_public_list(docs: List[Dict]) -> List[Dict]:
+    for doc in docs:
+        to_public(doc)
+    return docs
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered by orjson, skipping FastAPI's jsonable_encoder pass when returned directly."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,100 @@
+"""
+Checks that writes made while a catalog reload is in flight survive it.
+
+    python test_catalog_cache.py
+"""
+import copy
+import asyncio
+
+from catalog_cache import CatalogCache
+from product_index import ProductIndex
+from price_index import PriceIndex
+
+class SlowCursor:
+    """Returns the documents as they were when find() was called, once released."""
+
+    def __init__(self, docs, gate):
+        self.docs = copy.deepcopy(list(docs))
+        self.gate = gate
+
+    async def to_list(self, length=None):
+        await self.gate.wait()
+        return self.docs
+
+class FakeBusinesses:
+    def __init__(self, docs):
+        self.docs = {d["_id"]: d for d in docs}
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    def find(self, *args, **kwargs):
+        return SlowCursor(self.docs.values(), self.gate)
+
+    async def find_one(self, query, *args, **kwargs):
+        return copy.deepcopy(self.docs.get(query["_id"]))
+
+class FakeDb:
+    def __init__(self, docs):
+        self.businesses = FakeBusinesses(docs)
+
+def business(business_id, products=()):
+    return {"_id": business_id, "name": business_id.title(), "slug": business_id, "is_approved": True, "products": list(products)}
+
+PRODUCT = {"code": "TEA001", "name": "Slim Tea", "price": 5000}
+
+async def loaded_cache(docs):
+    db = FakeDb(docs)
+    cache, products, prices = CatalogCache(), ProductIndex(), PriceIndex()
+    cache.attach(products)
+    cache.attach(prices)
+    await cache.reload(db)
+    return db, cache, products, prices
+
+async def test_write_during_reload_survives():
+    print("Testing a product added while a reload is in flight...")
+    db, cache, products, prices = await loaded_cache([business("apinke")])
+
+    db.businesses.gate.clear()
+    reload = asyncio.create_task(cache.reload(db))
+    await asyncio.sleep(0)  # the reload has read the old documents and is waiting
+
+    db.businesses.docs["apinke"]["products"].append(PRODUCT)
+    await cache.refresh(db, "apinke")
+    assert len(cache.get("apinke").doc["products"]) == 1
+
+    db.businesses.gate.set()
+    await reload
+    assert len(cache.get("apinke").doc["products"]) == 1, "reload overwrote the newer write"
+    assert products.resolve("TEA001") is not None
+    assert prices.lookup("TEA001", business_slug="apinke") is not None
+
+async def test_delete_during_reload_stays_deleted():
+    print("Testing a business removed while a reload is in flight...")
+    db, cache, products, prices = await loaded_cache([business("apinke", [PRODUCT]), business("other")])
+
+    db.businesses.gate.clear()
+    reload = asyncio.create_task(cache.reload(db))
+    await asyncio.sleep(0)
+
+    del db.businesses.docs["apinke"]
+    await cache.refresh(db, "apinke")
+
+    db.businesses.gate.set()
+    await reload
+    assert cache.get("apinke") is None, "reload brought a deleted business back"
+    assert prices.lookup("TEA001", business_slug="apinke") is None
+    assert cache.get("other") is not None
+
+async def test_reload_without_writes():
+    print("Testing a plain reload picks up new documents...")
+    db, cache, _, _ = await loaded_cache([business("apinke")])
+    db.businesses.docs["other"] = business("other")
+    await cache.reload(db)
+    assert cache.get("other") is not None
+    assert not cache._write_logs
+
+if __name__ == "__main__":
+    asyncio.run(test_write_during_reload_survives())
+    asyncio.run(test_delete_during_reload_stays_deleted())
+    asyncio.run(test_reload_without_writes())
+    print("All catalog cache tests passed.")
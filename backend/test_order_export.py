@@ -0,0 +1,65 @@
+"""
+Checks the order export stream.
+
+    python test_order_export.py
+"""
+import io
+import csv
+import json
+import asyncio
+from datetime import datetime
+
+import order_export
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def batch_size(self, size):
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield dict(doc)
+
+ORDER = {
+    "_id": "ORD-1",
+    "created_at": datetime(2024, 1, 2, 3, 4, 5),
+    "status": "completed",
+    "customer_name": '=HYPERLINK("http://evil.example","Click")',
+    "customer_email": "@buyer@example.com",
+    "customer_phone": "+2348000000000",
+    "payment_method": "card",
+    "total_amount": 5000.0,
+    "items": [{"business_id": "apinke", "business_name": "-Apinke", "code": "\tTEA", "name": "\rTea", "quantity": 2, "price": 2500.0}],
+}
+
+async def export(fmt: str) -> bytes:
+    return b"".join([chunk async for chunk in order_export.stream(FakeCursor([ORDER]), fmt)])
+
+def test_csv_neutralizes_formulas():
+    print("Testing CSV formula injection...")
+    rows = list(csv.DictReader(io.StringIO(asyncio.run(export("csv")).decode("utf-8"))))
+    assert len(rows) == 1
+    row = rows[0]
+    assert row["customer_name"] == "'" + ORDER["customer_name"]
+    assert row["customer_email"] == "'@buyer@example.com"
+    assert row["customer_phone"] == "'+2348000000000"
+    assert row["business_name"] == "'-Apinke"
+    assert row["product_code"] == "'\tTEA"
+    assert row["product_name"] == "'\rTea"
+    # Numbers and ordinary text are untouched
+    assert row["order_id"] == "ORD-1" and row["quantity"] == "2" and row["line_total"] == "5000.0"
+
+def test_ndjson_is_unchanged():
+    print("Testing NDJSON keeps raw values...")
+    lines = asyncio.run(export("ndjson")).decode("utf-8").splitlines()
+    assert json.loads(lines[0])["customer_name"] == ORDER["customer_name"]
+
+if __name__ == "__main__":
+    test_csv_neutralizes_formulas()
+    test_ndjson_is_unchanged()
+    print("All order export tests passed.")
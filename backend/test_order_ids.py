@@ -0,0 +1,97 @@
+"""
+Checks order ID generation.
+
+    python test_order_ids.py
+"""
+import os
+import threading
+from unittest import mock
+
+import order_ids
+from order_ids import OrderIdGenerator
+
+def worker_part(order_id: str) -> str:
+    start = len(order_ids.PREFIX) + order_ids.TIME_CHARS
+    return order_id[start:start + order_ids.WORKER_CHARS]
+
+def with_worker_env(value):
+    """Mints one ID with ORDER_WORKER_ID set to value (None removes it)."""
+    previous = os.environ.pop("ORDER_WORKER_ID", None)
+    if value is not None:
+        os.environ["ORDER_WORKER_ID"] = value
+    try:
+        return OrderIdGenerator().new_id()
+    finally:
+        os.environ.pop("ORDER_WORKER_ID", None)
+        if previous is not None:
+            os.environ["ORDER_WORKER_ID"] = previous
+
+def test_configured_worker_id():
+    print("Testing a configured ORDER_WORKER_ID...")
+    assert worker_part(with_worker_env("7")) == order_ids._encode(7, order_ids.WORKER_CHARS)
+
+def test_empty_worker_id_is_unset():
+    print("Testing an empty ORDER_WORKER_ID, as shipped in .env.example...")
+    derived = worker_part(with_worker_env(None))
+    assert worker_part(with_worker_env("")) == derived
+    assert worker_part(with_worker_env("  ")) == derived
+
+def test_invalid_worker_id_falls_back():
+    print("Testing a non-numeric ORDER_WORKER_ID...")
+    assert worker_part(with_worker_env("web-1")) == worker_part(with_worker_env(None))
+
+def test_monotonic_within_a_millisecond():
+    print("Testing ordering within one millisecond...")
+    generator = OrderIdGenerator(worker_id=1)
+    with mock.patch("order_ids.time.time", return_value=1_700_000_000.0):
+        ids = [generator.new_id() for _ in range(10_000)]
+    assert ids == sorted(ids) and len(set(ids)) == len(ids)
+
+def test_monotonic_when_clock_goes_back():
+    print("Testing ordering when the clock moves backwards...")
+    generator = OrderIdGenerator(worker_id=1)
+    with mock.patch("order_ids.time.time", return_value=1_700_000_000.0):
+        first = generator.new_id()
+    with mock.patch("order_ids.time.time", return_value=1_699_999_999.0):
+        second = generator.new_id()
+    assert second > first
+
+def test_sequence_overflow_rolls_into_next_millisecond():
+    print("Testing sequence overflow...")
+    generator = OrderIdGenerator(worker_id=1)
+    with mock.patch("order_ids.time.time", return_value=1_700_000_000.0):
+        generator.new_id()
+        generator._sequence = order_ids.MAX_SEQUENCE
+        before = generator._last_ms
+        overflowed = generator.new_id()
+    assert generator._last_ms == before + 1 and generator._sequence == 0
+    assert overflowed.endswith("0" * order_ids.SEQUENCE_CHARS)
+
+def test_unique_under_concurrent_mints():
+    print("Testing uniqueness across threads...")
+    generator = OrderIdGenerator(worker_id=1)
+    minted = [[] for _ in range(8)]
+
+    def mint(out):
+        for _ in range(5_000):
+            out.append(generator.new_id())
+
+    threads = [threading.Thread(target=mint, args=(out,)) for out in minted]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    all_ids = [order_id for out in minted for order_id in out]
+    assert len(set(all_ids)) == len(all_ids)
+    # Each thread sees its own IDs strictly increasing
+    assert all(out == sorted(out) for out in minted)
+
+if __name__ == "__main__":
+    test_configured_worker_id()
+    test_empty_worker_id_is_unset()
+    test_invalid_worker_id_falls_back()
+    test_monotonic_within_a_millisecond()
+    test_monotonic_when_clock_goes_back()
+    test_sequence_overflow_rolls_into_next_millisecond()
+    test_unique_under_concurrent_mints()
+    print("All order ID tests passed.")
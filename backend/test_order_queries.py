@@ -0,0 +1,40 @@
+"""
+Checks order listing filters and keyset cursors.
+
+    python test_order_queries.py
+"""
+from datetime import datetime, timedelta, timezone
+
+from order_queries import InvalidCursor, build_filter, decode_cursor, encode_cursor
+
+def test_offset_dates_convert_to_utc():
+    print("Testing from/to with a UTC offset...")
+    lagos = timezone(timedelta(hours=1))
+    query = build_filter(start=datetime(2024, 1, 1, tzinfo=lagos), end=datetime(2024, 2, 1, tzinfo=lagos))
+    assert query["created_at"] == {"$gte": datetime(2023, 12, 31, 23), "$lt": datetime(2024, 1, 31, 23)}
+
+def test_naive_dates_are_utc():
+    print("Testing naive from/to...")
+    query = build_filter(start=datetime(2024, 1, 1))
+    assert query["created_at"] == {"$gte": datetime(2024, 1, 1)}
+
+def test_cursor_round_trip():
+    print("Testing cursor round trip...")
+    order = {"_id": "ORD-1", "created_at": datetime(2024, 5, 6, 7, 8, 9, 123000)}
+    assert decode_cursor(encode_cursor(order)) == (order["created_at"], "ORD-1")
+
+def test_bad_cursors():
+    print("Testing malformed cursors...")
+    for cursor in ("nope", "123", "abc.ORD-1", "9" * 40 + ".ORD-1", "-" + "9" * 40 + ".ORD-1"):
+        try:
+            decode_cursor(cursor)
+        except InvalidCursor:
+            continue
+        raise AssertionError(f"{cursor!r} was accepted")
+
+if __name__ == "__main__":
+    test_offset_dates_convert_to_utc()
+    test_naive_dates_are_utc()
+    test_cursor_round_trip()
+    test_bad_cursors()
+    print("All order query tests passed.")
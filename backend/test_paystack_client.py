@@ -0,0 +1,135 @@
+"""
+Exercises paystack_client timeouts, retries and the circuit breaker against
+fake_paystack.py, started here on a local port.
+
+    python test_paystack_client.py
+"""
+import os
+import time
+import asyncio
+
+import httpx
+
+PORT = 8766
+BASE_URL = f"http://127.0.0.1:{PORT}"
+os.environ["PAYSTACK_API_URL"] = BASE_URL
+os.environ["PAYSTACK_SECRET_KEY"] = "sk_test_fake"
+os.environ["PAYSTACK_READ_TIMEOUT"] = "0.5"
+os.environ["PAYSTACK_MAX_RETRIES"] = "2"
+os.environ["PAYSTACK_BREAKER_THRESHOLD"] = "3"
+os.environ["PAYSTACK_BREAKER_RESET_SECONDS"] = "1"
+
+import fake_paystack
+from fake_servers import serve_in_thread
+from paystack_client import PaystackClient, PaystackError
+
+def configure(latency_ms: float = 20, failure_rate: float = 0.0):
+    fake_paystack.LATENCY_MS = latency_ms
+    fake_paystack.FAILURE_RATE = failure_rate
+    httpx.post(f"{BASE_URL}/stats/reset")
+
+def calls(endpoint: str) -> int:
+    return httpx.get(f"{BASE_URL}/stats").json()[endpoint]
+
+def payload(reference: str):
+    return {"email": "buyer@example.com", "amount": 450000, "reference": reference}
+
+async def expect_error(call, status_code: int) -> PaystackError:
+    try:
+        await call
+    except PaystackError as e:
+        assert e.status_code == status_code, f"expected {status_code}, got {e.status_code}: {e.detail}"
+        return e
+    raise AssertionError(f"expected PaystackError {status_code}")
+
+async def test_initialize():
+    print("Testing a successful initialize...")
+    configure()
+    client = PaystackClient()
+    result = await client.initialize_transaction(payload("ref-ok"))
+    await client.aclose()
+    assert result["data"]["reference"] == "ref-ok"
+    assert result["data"]["authorization_url"]
+    assert calls("initialize") == 1
+
+async def test_initialize_timeout_not_retried():
+    print("Testing that a timed-out initialize is not repeated...")
+    # Slower than the 0.5 s read timeout: the fake still records the transaction
+    configure(latency_ms=1000)
+    client = PaystackClient()
+    await expect_error(client.initialize_transaction(payload("ref-timeout")), 504)
+    await client.aclose()
+    # A retry would have come back as "Duplicate Transaction Reference"
+    assert calls("initialize") == 1
+
+async def test_initialize_5xx_not_retried():
+    print("Testing that a 503 from initialize is not repeated...")
+    configure(failure_rate=1.0)
+    client = PaystackClient()
+    await expect_error(client.initialize_transaction(payload("ref-503")), 503)
+    await client.aclose()
+    assert calls("initialize") == 1
+
+async def test_verify_retries_5xx():
+    print("Testing that verify retries 503s...")
+    configure(failure_rate=1.0)
+    client = PaystackClient()
+    await expect_error(client.verify_transaction("ref-ok"), 503)
+    await client.aclose()
+    assert calls("verify") == 3, calls("verify")
+
+async def test_connect_error_retried():
+    print("Testing that connection failures are retried...")
+    attempts = 0
+
+    async def count(request):
+        nonlocal attempts
+        attempts += 1
+
+    client = PaystackClient(base_url="http://127.0.0.1:1")
+    client._http().event_hooks["request"].append(count)
+    await expect_error(client.initialize_transaction(payload("ref-unreachable")), 502)
+    await client.aclose()
+    assert attempts == 3, attempts
+
+async def test_flaky_provider():
+    print("Testing verify against a 30% failure rate...")
+    configure(failure_rate=0.3)
+    client = PaystackClient()
+    client.breaker.threshold = 100
+    results = await asyncio.gather(*[client.verify_transaction("ref-ok") for _ in range(20)], return_exceptions=True)
+    await client.aclose()
+    succeeded = sum(1 for r in results if not isinstance(r, Exception))
+    print(f"{succeeded}/20 succeeded with retries ({calls('verify')} calls)")
+    assert succeeded >= 15
+
+async def test_circuit_breaker():
+    print("Testing the circuit breaker...")
+    configure(failure_rate=1.0)
+    client = PaystackClient()
+    for i in range(3):
+        await expect_error(client.initialize_transaction(payload(f"ref-breaker-{i}")), 503)
+    assert client.breaker.state == "open"
+
+    error = await expect_error(client.initialize_transaction(payload("ref-breaker-open")), 503)
+    assert "temporarily unavailable" in error.detail
+    assert calls("initialize") == 3, "open circuit still sent a request"
+
+    # After the reset window one trial request goes through and closes the circuit
+    time.sleep(1.1)
+    configure()
+    result = await client.initialize_transaction(payload("ref-breaker-trial"))
+    await client.aclose()
+    assert result["status"] is True
+    assert client.breaker.state == "closed"
+
+if __name__ == "__main__":
+    serve_in_thread(fake_paystack.app, PORT)
+    asyncio.run(test_initialize())
+    asyncio.run(test_initialize_timeout_not_retried())
+    asyncio.run(test_initialize_5xx_not_retried())
+    asyncio.run(test_verify_retries_5xx())
+    asyncio.run(test_connect_error_retried())
+    asyncio.run(test_flaky_provider())
+    asyncio.run(test_circuit_breaker())
+    print("All Paystack client tests passed.")
@@ -0,0 +1,146 @@
+"""
+Checks server-side cart repricing: the price index quote and the checkout
+guard in main.price_cart. Runs without MongoDB; the catalog and scrape
+cache are loaded from in-memory documents.
+
+    python test_pricing.py
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+
+import main
+from main import CheckoutRequest, price_cart
+from price_index import PriceIndex, synced_entry
+from scrape_cache import scrape_cache
+
+BUSINESS = {
+    "_id": "apinke-herbs", "name": "Apinke Herbs", "slug": "apinke-herbs", "is_approved": True,
+    "products": [
+        {"code": "TEA001", "name": "Slim Tea", "price": 5000},
+        {"code": "OIL001", "name": "Shea Oil", "price": 2500},
+    ],
+}
+OTHER = {
+    "_id": "other-shop", "name": "Other Shop", "slug": "other-shop", "is_approved": True,
+    "products": [{"code": "TEA001", "name": "Other Tea", "price": 9000}],
+}
+SYNCED = {
+    "code": "SYNC-0123", "whatsapp_id": "1234567890123", "name": "Shea Butter", "price": 4500.0,
+    "business_name": "Apinke Herbs", "business_slug": "wa-apinke-herbs", "auto_synced": True,
+}
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        return self.docs
+
+class FakeDb:
+    class businesses:
+        @staticmethod
+        def find(*args, **kwargs):
+            return FakeCursor([dict(BUSINESS), dict(OTHER)])
+
+def cart_item(code="TEA001", price=5000, quantity=1, business_slug="apinke-herbs", **extra):
+    return {"code": code, "name": code, "price": price, "quantity": quantity,
+            "business_name": "Apinke Herbs", "business_slug": business_slug, **extra}
+
+def checkout(items, total):
+    return CheckoutRequest(customer_name="A", customer_email="a@example.com", customer_phone="080", items=items, total_amount=total)
+
+async def expect_409(request) -> dict:
+    try:
+        await price_cart(request)
+    except HTTPException as e:
+        assert e.status_code == 409, e.status_code
+        return e.detail
+    raise AssertionError("cart was accepted")
+
+def setup():
+    asyncio.run(main.catalog_cache.reload(FakeDb()))
+    now = datetime.utcnow()
+    scrape_cache._remember({"_id": "1234567890123", "product": SYNCED, "fetched_at": now, "expires_at": now + timedelta(days=1)})
+    scrape_cache._remember({"_id": "9999999999999", "product": None, "fetched_at": now, "expires_at": now + timedelta(minutes=5)})
+
+def test_quote_prices_per_business():
+    print("Testing quotes keep codes apart per business...")
+    index = PriceIndex()
+    index.rebuild([BUSINESS, OTHER])
+    quote = index.quote([cart_item(quantity=2), cart_item(business_slug="other-shop", price=9000)])
+    assert [line["line_total"] for line in quote["items"]] == [10000.0, 9000.0]
+    assert quote["total_amount"] == 19000.0 and not quote["changed"] and not quote["unavailable"]
+
+def test_quote_reports_unavailable_lines():
+    print("Testing unknown and zero-quantity lines...")
+    index = PriceIndex()
+    index.rebuild([BUSINESS])
+    quote = index.quote([cart_item(code="NOPE"), cart_item(quantity=0), cart_item(business_slug="missing-shop")])
+    assert len(quote["unavailable"]) == 3 and not quote["items"] and quote["total_amount"] == 0
+
+def test_synced_entry_needs_a_price():
+    print("Testing scraped products without a price can't be sold...")
+    assert synced_entry(None) is None
+    assert synced_entry(dict(SYNCED, price=0)) is None
+    assert synced_entry(SYNCED)["price"] == 4500.0
+
+def test_checkout_accepts_current_prices():
+    print("Testing a cart with current prices...")
+    quote = asyncio.run(price_cart(checkout([cart_item(quantity=2), cart_item(code="OIL001", price=2500)], 12500)))
+    assert quote["total_amount"] == 12500.0
+
+def test_checkout_rejects_stale_price():
+    print("Testing a stale price gets a 409 with the fresh quote...")
+    detail = asyncio.run(expect_409(checkout([cart_item(price=4000)], 4000)))
+    assert "changed" in detail["message"]
+    assert detail["changed"] == [{"code": "TEA001", "business_slug": "apinke-herbs", "submitted_price": 4000.0, "price": 5000.0}]
+    assert detail["total_amount"] == 5000.0
+
+def test_checkout_ignores_tampered_price():
+    print("Testing a tampered price and total are not trusted...")
+    detail = asyncio.run(expect_409(checkout([cart_item(price=1, quantity=3)], 3)))
+    assert detail["items"][0]["price"] == 5000.0 and detail["total_amount"] == 15000.0
+    # Right prices but a wrong total is rejected too
+    asyncio.run(expect_409(checkout([cart_item()], 1)))
+
+def test_checkout_rejects_unavailable_lines():
+    print("Testing unknown and zero-quantity lines at checkout...")
+    detail = asyncio.run(expect_409(checkout([cart_item(code="NOPE"), cart_item(quantity=0)], 0)))
+    assert "no longer available" in detail["message"]
+    assert [line["code"] for line in detail["unavailable"]] == ["NOPE", "TEA001"]
+
+def test_checkout_prices_synced_items_from_scrape_cache():
+    print("Testing Sync Station products are priced from the scrape cache...")
+    synced = dict(SYNCED, quantity=2)
+    quote = asyncio.run(price_cart(checkout([synced, cart_item()], 14000)))
+    line = quote["items"][0]
+    assert line["price"] == 4500.0 and line["line_total"] == 9000.0 and line["business_id"] is None
+    assert main.order_business_ids(quote["items"]) == ["apinke-herbs"]
+
+    detail = asyncio.run(expect_409(checkout([dict(SYNCED, price=1)], 1)))
+    assert detail["items"][0]["price"] == 4500.0
+
+    # Without auto_synced the submitted product isn't looked up in the scrape cache
+    detail = asyncio.run(expect_409(checkout([dict(SYNCED, auto_synced=False)], 4500)))
+    assert detail["unavailable"]
+
+def test_checkout_rejects_dead_synced_link():
+    print("Testing a synced product whose link is gone...")
+    dead = dict(SYNCED, whatsapp_id="9999999999999", name="Dead link")
+    detail = asyncio.run(expect_409(checkout([dead], 4500)))
+    assert "Dead link" in detail["message"]
+
+if __name__ == "__main__":
+    setup()
+    test_quote_prices_per_business()
+    test_quote_reports_unavailable_lines()
+    test_synced_entry_needs_a_price()
+    test_checkout_accepts_current_prices()
+    test_checkout_rejects_stale_price()
+    test_checkout_ignores_tampered_price()
+    test_checkout_rejects_unavailable_lines()
+    test_checkout_prices_synced_items_from_scrape_cache()
+    test_checkout_rejects_dead_synced_link()
+    print("All pricing tests passed.")
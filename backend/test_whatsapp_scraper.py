@@ -0,0 +1,85 @@
+"""
+Exercises whatsapp_scraper against fake_whatsapp.py, started here on a local port.
+
+    python test_whatsapp_scraper.py
+"""
+import os
+import time
+import asyncio
+
+import httpx
+
+PORT = 8765
+BASE_URL = f"http://127.0.0.1:{PORT}"
+os.environ["WHATSAPP_BASE_URL"] = BASE_URL
+os.environ["SCRAPER_PER_HOST_LIMIT"] = "2"
+
+import fake_whatsapp
+from fake_servers import serve_in_thread
+import data_manager
+from whatsapp_scraper import WhatsAppScraper
+
+async def test_scrape_parses_head():
+    print("Testing scrape of a wa.me product link...")
+    scraper = WhatsAppScraper()
+    started = time.perf_counter()
+    product = await scraper.scrape("https://wa.me/p/1234567890123/2348000000000")
+    elapsed = time.perf_counter() - started
+    await scraper.aclose()
+    print(f"Scraped in {elapsed * 1000:.0f} ms: {product}")
+    assert product["whatsapp_id"] == "1234567890123"
+    assert product["name"] == "Shea Butter 0123"
+    assert product["business_name"] == "Apinke Herbs"
+    assert product["price"] == 4500.0
+    # The fake body trickles for ~10 s; returning quickly means we stopped at </head>
+    assert elapsed < 2, "scraper read past </head>"
+
+async def test_missing_product():
+    print("Testing a link that 404s...")
+    scraper = WhatsAppScraper()
+    assert await scraper.scrape("https://wa.me/p/missing-product") is None
+    await scraper.aclose()
+
+async def test_per_host_limit():
+    print("Testing per-host concurrency limit...")
+    httpx.post(f"{BASE_URL}/stats/reset")
+    scraper = WhatsAppScraper()
+
+    results = await asyncio.gather(*[scraper.scrape(f"https://wa.me/p/{1000000000000 + i}") for i in range(8)])
+    await scraper.aclose()
+    stats = httpx.get(f"{BASE_URL}/stats").json()
+    print(f"Peak concurrent requests: {stats['peak']}")
+    assert all(results)
+    assert stats["peak"] <= 2
+
+async def test_event_loop_stays_responsive():
+    print("Testing that the event loop keeps running during scrapes...")
+    scraper = WhatsAppScraper()
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    await asyncio.gather(*[scraper.scrape(f"https://wa.me/p/{2000000000000 + i}") for i in range(4)])
+    task.cancel()
+    await scraper.aclose()
+    print(f"Ticker ran {ticks} times while scraping")
+    assert ticks > 5
+
+def test_sync_facade():
+    print("Testing the blocking data_manager facade...")
+    product = data_manager.scrape_whatsapp_metadata("https://wa.me/p/3000000000000")
+    assert product and product["whatsapp_id"] == "3000000000000"
+
+if __name__ == "__main__":
+    serve_in_thread(fake_whatsapp.app, PORT)
+    asyncio.run(test_scrape_parses_head())
+    asyncio.run(test_missing_product())
+    asyncio.run(test_per_host_limit())
+    asyncio.run(test_event_loop_stays_responsive())
+    test_sync_facade()
+    print("All scraper tests passed.")
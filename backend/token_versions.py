@@ -0,0 +1,49 @@
+import os
+import time
+import asyncio
+from typing import Dict
+
+from pymongo import ReturnDocument
+
+# How often the revocation table is re-read from MongoDB
+TOKEN_VERSION_REFRESH_SECONDS = float(os.getenv("TOKEN_VERSION_REFRESH_SECONDS", "30"))
+
+class TokenVersionTable:
+    """
+    In-memory copy of the token_revocations collection (email -> version).
+    Only users whose tokens were ever revoked have a row, so the whole table
+    is small enough to reload periodically. Tokens carrying an older "ver"
+    claim than the table are rejected.
+    """
+
+    def __init__(self):
+        self._versions: Dict[str, int] = {}
+        self._loaded_at = None
+        self._lock = asyncio.Lock()
+
+    async def ensure_fresh(self, db):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < TOKEN_VERSION_REFRESH_SECONDS:
+            return
+        async with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < TOKEN_VERSION_REFRESH_SECONDS:
+                return
+            rows = await db.token_revocations.find().to_list(length=None)
+            self._versions = {row["_id"]: row.get("version", 0) for row in rows}
+            self._loaded_at = time.monotonic()
+
+    def current(self, email: str) -> int:
+        return self._versions.get(email, 0)
+
+    async def revoke(self, db, email: str) -> int:
+        """Invalidates every token issued to email so far and returns the new version."""
+        row = await db.token_revocations.find_one_and_update(
+            {"_id": email},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        await db.users.update_one({"email": email}, {"$set": {"token_version": row["version"]}})
+        self._versions[email] = row["version"]
+        return row["version"]
+
+token_versions = TokenVersionTable()
@@ -0,0 +1,60 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+
+class UserCache:
+    """
+    LRU cache of user documents keyed by normalized email (the JWT subject).
+    Entries expire after ttl seconds so changes made outside this process
+    (e.g. make_admin.py) are picked up without an explicit invalidation.
+    """
+
+    def __init__(self, max_entries: int = USER_CACHE_MAX_ENTRIES, ttl: float = USER_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, email: str) -> Optional[Dict]:
+        entry = self._entries.get(email)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[email]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(email)
+        self.hits += 1
+        return dict(entry[1])
+
+    def put(self, email: str, user: Dict):
+        self._entries[email] = (time.monotonic() + self.ttl, dict(user))
+        self._entries.move_to_end(email)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, email: str):
+        self._entries.pop(email, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+user_cache = UserCache()
@@ -0,0 +1,136 @@
+import os
+import hmac
+import asyncio
+import hashlib
+from datetime import datetime
+from typing import Dict, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+WEBHOOK_BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", "100"))
+# Fallback poll interval, so events written by another worker are drained too
+WEBHOOK_POLL_SECONDS = float(os.getenv("WEBHOOK_POLL_SECONDS", "2"))
+
+# Paystack event -> order status it moves the order to
+EVENT_STATUS = {
+    "charge.success": "completed",
+    "charge.failed": "failed",
+}
+
+def verify_signature(body: bytes, signature: Optional[str], secret_key: str) -> bool:
+    """Checks Paystack's x-paystack-signature header (HMAC-SHA512 of the raw body)."""
+    if not signature:
+        return False
+    expected = hmac.new(secret_key.encode("utf-8"), body, hashlib.sha512).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+def event_key(payload: Dict, body: bytes) -> str:
+    """Stable ID for an event, so redeliveries of the same event dedupe."""
+    data = payload.get("data") or {}
+    if data.get("id") is not None:
+        return f"{payload.get('event')}:{data['id']}"
+    return "sha256:" + hashlib.sha256(body).hexdigest()
+
+def order_update(event: Dict) -> Optional[UpdateOne]:
+    status = EVENT_STATUS.get(event.get("event"))
+    reference = event.get("reference")
+    if status is None or not reference:
+        return None
+    # A completed order never moves back; a failure only applies to pending orders
+    guard = {"$ne": "completed"} if status == "completed" else "pending"
+    return UpdateOne(
+        {"_id": reference, "status": guard},
+        {"$set": {"status": status, "updated_at": event["received_at"]}},
+    )
+
+class WebhookQueue:
+    """
+    Append-only webhook_events collection drained by an in-process worker.
+    The HTTP handler only inserts the event; order updates are applied in
+    batches with bulk_write off the request path.
+    """
+
+    def __init__(self):
+        self.received = 0
+        self.duplicates = 0
+        self.processed = 0
+        self.batches = 0
+        self.last_lag_seconds = 0.0
+        self._wake = asyncio.Event()
+        self._listeners = []
+
+    def on_processed(self, callback):
+        """Registers an async callback(db, events) run after each applied batch."""
+        self._listeners.append(callback)
+
+    async def enqueue(self, db, payload: Dict, body: bytes) -> bool:
+        """Persists an event. Returns False if it was already received."""
+        data = payload.get("data") or {}
+        event = {
+            "_id": event_key(payload, body),
+            "event": payload.get("event"),
+            "reference": data.get("reference"),
+            "payload": payload,
+            "received_at": datetime.utcnow(),
+            "processed": False,
+        }
+        try:
+            await db.webhook_events.insert_one(event)
+        except DuplicateKeyError:
+            self.duplicates += 1
+            return False
+        self.received += 1
+        self._wake.set()
+        return True
+
+    async def drain(self, db) -> int:
+        """Applies one batch of pending events. Returns how many were handled."""
+        events = await db.webhook_events.find({"processed": False}).sort("received_at", 1).limit(WEBHOOK_BATCH_SIZE).to_list(length=WEBHOOK_BATCH_SIZE)
+        if not events:
+            return 0
+        operations = [op for op in (order_update(e) for e in events) if op is not None]
+        if operations:
+            await db.orders.bulk_write(operations, ordered=False)
+        for callback in self._listeners:
+            await callback(db, events)
+        now = datetime.utcnow()
+        await db.webhook_events.update_many(
+            {"_id": {"$in": [e["_id"] for e in events]}},
+            {"$set": {"processed": True, "processed_at": now}},
+        )
+        self.processed += len(events)
+        self.batches += 1
+        self.last_lag_seconds = (now - events[0]["received_at"]).total_seconds()
+        return len(events)
+
+    async def run(self, db):
+        """Worker loop started from the app lifespan."""
+        while True:
+            self._wake.clear()
+            try:
+                while await self.drain(db) == WEBHOOK_BATCH_SIZE:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"WARNING: Webhook batch failed, will retry: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=WEBHOOK_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def metrics(self, db) -> Dict:
+        depth = await db.webhook_events.count_documents({"processed": False})
+        oldest = await db.webhook_events.find_one({"processed": False}, sort=[("received_at", 1)])
+        return {
+            "queue_depth": depth,
+            "oldest_pending_seconds": (datetime.utcnow() - oldest["received_at"]).total_seconds() if oldest else 0.0,
+            "received": self.received,
+            "duplicates": self.duplicates,
+            "processed": self.processed,
+            "batches": self.batches,
+            "last_batch_lag_seconds": self.last_lag_seconds,
+        }
+
+webhook_queue = WebhookQueue()
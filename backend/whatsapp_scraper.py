@@ -0,0 +1,159 @@
+import os
+import re
+import html
+import asyncio
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from data_manager import extract_whatsapp_id
+
+# Point this at fake_whatsapp.py for tests; wa.me links are rewritten onto it
+WHATSAPP_BASE_URL = os.getenv("WHATSAPP_BASE_URL", "https://wa.me").rstrip("/")
+
+SCRAPER_CONNECT_TIMEOUT = float(os.getenv("SCRAPER_CONNECT_TIMEOUT", "3"))
+SCRAPER_READ_TIMEOUT = float(os.getenv("SCRAPER_READ_TIMEOUT", "10"))
+SCRAPER_PER_HOST_LIMIT = int(os.getenv("SCRAPER_PER_HOST_LIMIT", "4"))
+# OG tags live in <head>; stop reading there, or after this many bytes
+MAX_HEAD_BYTES = 256 * 1024
+HEAD_END = re.compile(rb"</head\s*>", re.IGNORECASE)
+
+DEFAULT_IMAGE = "https://images.unsplash.com/photo-1556742049-0cfed4f6a45d?auto=format&fit=crop&q=80&w=1200"
+
+# Mobile browser headers; WhatsApp serves its OG preview page to these
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (iPhone; CPU iPhone OS 14_8 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.2 Mobile/15E148 Safari/604.1",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Upgrade-Insecure-Requests": "1",
+    "Cache-Control": "max-age=0",
+}
+
+def normalize_url(url: str) -> str:
+    # Force https, and route wa.me through WHATSAPP_BASE_URL
+    if url.startswith("http:/") and not url.startswith("https://"):
+        url = url.replace("http:/", "https:/", 1)
+    for prefix in ("https://wa.me", "https://www.wa.me"):
+        if url.startswith(prefix + "/"):
+            return WHATSAPP_BASE_URL + url[len(prefix):]
+    return url
+
+def parse_metadata(html_content: str, url: str, final_url: str) -> Optional[Dict]:
+    """Builds a Sync Station product from a WhatsApp page's OG tags."""
+    og_title = re.search(r'<meta property="og:title" content="([^"]+)"', html_content)
+    og_desc = re.search(r'<meta property="og:description" content="([^"]+)"', html_content)
+    og_image = re.search(r'<meta property="og:image" content="([^"]+)"', html_content)
+
+    if not og_title:
+        # Fallback: check <title> tag
+        title_tag = re.search(r'<title>([^<]+)</title>', html_content)
+        if not title_tag:
+            return None
+        title_text = title_tag.group(1)
+    else:
+        title_text = og_title.group(1)
+
+    # Unescape HTML entities (e.g., &amp; -> &)
+    title_text = html.unescape(title_text)
+    desc_text = html.unescape(og_desc.group(1)) if og_desc else ""
+    image_url = html.unescape(og_image.group(1)) if og_image else ""
+
+    # Clean up title: often contains "WhatsApp" or "Business"
+    product_name = title_text.split(" from ")[0].replace(" on WhatsApp", "").strip()
+    product_name = re.sub(r'#\w+', '', product_name).strip()
+
+    business_name = "WhatsApp Shop"
+    if " from " in title_text:
+        business_name = title_text.split(" from ")[1].split(" on WhatsApp")[0].strip()
+
+    price = 0
+    description = desc_text
+    price_match = re.search(r'(?:NGN|₦|₦)\s?([\d,]+(?:\.\d{2})?)', desc_text)
+    if price_match:
+        price = float(price_match.group(1).replace(',', ''))
+        description = desc_text.split(" · ")[0] if " · " in desc_text else desc_text
+
+    description = re.sub(r'#\w+', '', description).strip()
+    description = description.replace('\n', ' ').strip()
+
+    # Prefer the redirect target when it is still a WhatsApp product link
+    source = final_url if final_url and ("wa.me/p/" in final_url or "whatsapp.com/catalog/" in final_url) else url
+    whatsapp_id = extract_whatsapp_id(source)
+
+    return {
+        "code": f"SYNC-{whatsapp_id[-4:]}" if whatsapp_id else "SYNC-AUTO",
+        "whatsapp_id": whatsapp_id,
+        "name": product_name,
+        "price": price,
+        "description": description,
+        "image": image_url or DEFAULT_IMAGE,
+        "business_name": business_name,
+        "business_slug": "wa-" + business_name.lower().replace(" ", "-"),
+        "auto_synced": True,
+    }
+
+class WhatsAppScraper:
+    """
+    Async scraper sharing one keep-alive client. Requests to the same host
+    are capped at per_host_limit, and only the page head is downloaded.
+    """
+
+    def __init__(self, per_host_limit: int = SCRAPER_PER_HOST_LIMIT):
+        self.per_host_limit = per_host_limit
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=HEADERS,
+                follow_redirects=True,
+                timeout=httpx.Timeout(SCRAPER_READ_TIMEOUT, connect=SCRAPER_CONNECT_TIMEOUT),
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+            )
+        return self._client
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return limit
+
+    async def fetch_head(self, url: str):
+        """Returns (head html, final url), reading the body only up to </head>."""
+        async with self._host_limit(url):
+            async with self._http().stream("GET", url) as response:
+                response.raise_for_status()
+                received = bytearray()
+                async for chunk in response.aiter_bytes():
+                    # Search from just before the new chunk in case the tag spans two chunks
+                    start = max(len(received) - 8, 0)
+                    received.extend(chunk)
+                    match = HEAD_END.search(received, start)
+                    if match:
+                        del received[match.end():]
+                        break
+                    if len(received) >= MAX_HEAD_BYTES:
+                        break
+                encoding = response.encoding or "utf-8"
+                return bytes(received).decode(encoding, errors="replace"), str(response.url)
+
+    async def scrape(self, url: str) -> Optional[Dict]:
+        """Fetches product metadata from a WhatsApp link, or None if it can't be read."""
+        target = normalize_url(url)
+        try:
+            head, final_url = await self.fetch_head(target)
+        except Exception as e:
+            print(f"Scraping failed for {url}: {e}")
+            return None
+        # Regex parsing runs in a worker thread so large pages don't stall the loop
+        return await asyncio.to_thread(parse_metadata, head, url, final_url)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+whatsapp_scraper = WhatsAppScraper()
@@ -106,6 +106,14 @@ function App() {
           setCart([]);
           setShowCheckout(false);
         }
+      } else if (response.status === 409) {
+        // Prices changed or items went away since they were added; take the server's quote and let the user review.
+        // Codes are only unique within a business, so lines are matched on (business_slug, code).
+        const { detail } = await response.json();
+        const lineKey = item => `${item.business_slug}:${item.code}`;
+        const quoted = Object.fromEntries(detail.items.map(item => [lineKey(item), item]));
+        setCart(cart.map(item => quoted[lineKey(item)] ? { ...item, price: quoted[lineKey(item)].price } : item));
+        throw new Error(detail.message);
       } else {
         const errorData = await response.json();
         throw new Error(errorData.detail || 'Checkout failed');
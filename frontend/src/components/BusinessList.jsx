@@ -1,15 +1,14 @@
 import { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { ExternalLink, ShoppingBag } from 'lucide-react';
-import { API_URL } from '../config';
+import { API_URL, fetchAllPages } from '../config';
 
 export default function BusinessList() {
   const [businesses, setBusinesses] = useState([]);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
-    fetch(`${API_URL}/businesses`)
-      .then(res => res.json())
+    fetchAllPages(`${API_URL}/businesses?fields=summary`)
       .then(data => {
         setBusinesses(data);
         setLoading(false);
@@ -40,6 +40,11 @@ export default function SyncStation({ onProductSynced }) {
 
       const product = await response.json();
       onProductSynced(product);
+
+      // Stale scrape: ask the backend to re-scrape in the background so the next sync is fresh
+      if (response.headers.get('X-Cache') === 'STALE') {
+        fetch(`${API_URL}/sync/${encodedIdentifier}?refresh=true`).catch(() => {});
+      }
       setIdentifier('');
       setSuccess(true);
       setTimeout(() => setSuccess(false), 3000);
@@ -3,3 +3,19 @@ export const API_URL = import.meta.env.VITE_API_URL || (
     ? `http://${window.location.hostname}:8000`
     : 'http://127.0.0.1:8000'
 );
+
+// Fetches every page of a keyset-paginated list endpoint by following the
+// X-Next-Cursor response header.
+export async function fetchAllPages(url, options = {}) {
+  const items = [];
+  let cursor = null;
+  do {
+    const pageUrl = new URL(url);
+    if (cursor) pageUrl.searchParams.set('after', cursor);
+    const res = await fetch(pageUrl, options);
+    if (!res.ok) throw new Error('Network response was not ok');
+    items.push(...await res.json());
+    cursor = res.headers.get('X-Next-Cursor');
+  } while (cursor);
+  return items;
+}
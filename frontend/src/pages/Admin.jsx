@@ -29,6 +29,7 @@ const StatusBadge = ({ status }) => (
 
 export default function Admin() {
   const [orders, setOrders] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [users, setUsers] = useState([]);
   const [businesses, setBusinesses] = useState([]);
   const [analytics, setAnalytics] = useState(null);
@@ -66,19 +67,24 @@ export default function Admin() {
     } catch (e) { console.error(e); }
   };
 
-  const fetchOrders = async () => {
+  const fetchOrders = async (after = null) => {
     setError(null);
     try {
-      const r = await authFetch(`${API_URL}/orders`);
+      const url = new URL(`${API_URL}/orders`);
+      url.searchParams.set('limit', '100');
+      if (after) url.searchParams.set('after', after);
+      const r = await authFetch(url);
       if (!r.ok) throw new Error(`HTTP ${r.status}`);
-      const data = await r.json();
-      if (!Array.isArray(data)) throw new Error('Invalid response');
+      const page = await r.json();
+      if (!Array.isArray(page)) throw new Error('Invalid response');
+      const data = after ? [...orders, ...page] : page;
       setOrders(data);
+      setNextCursor(r.headers.get('X-Next-Cursor'));
       setStats({
         totalOrders: data.length,
         totalRevenue: data.reduce((s, o) => s + (o.total_amount || 0), 0),
         totalCustomers: new Set(data.filter(o => o.customer_email).map(o => o.customer_email)).size,
-        totalProducts: data.reduce((s, o) => s + (o.items || []).reduce((is, i) => is + (i.quantity || 0), 0), 0)
+        totalProducts: data.reduce((s, o) => s + (o.item_count || 0), 0)
       });
     } catch (e) { setError(e.message); }
   };
@@ -90,6 +96,12 @@ export default function Admin() {
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ event: 'charge.success', data: { reference: orderId } })
       });
+      // The webhook worker applies the event asynchronously; wait for the status to change
+      for (let attempt = 0; attempt < 10; attempt++) {
+        const r = await authFetch(`${API_URL}/orders/${encodeURIComponent(orderId)}`);
+        if (!r.ok || (await r.json()).status !== 'pending') break;
+        await new Promise(resolve => setTimeout(resolve, 500));
+      }
       fetchOrders();
     } catch (e) { console.error(e); }
   };
@@ -210,11 +222,7 @@ export default function Admin() {
                               <div style={{ fontWeight: 600 }}>{order.customer_name}</div>
                               <div style={{ fontSize: '0.75rem', color: 'var(--text-muted)' }}>{order.customer_email}</div>
                             </td>
-                            <td style={{ padding: '0.85rem 1rem' }}>
-                              {(order.items || []).map((item, i) => (
-                                <div key={i} style={{ fontSize: '0.8rem' }}>{item.quantity}× {item.name}</div>
-                              ))}
-                            </td>
+                            <td style={{ padding: '0.85rem 1rem', fontSize: '0.8rem' }}>{order.item_count} item{order.item_count === 1 ? '' : 's'}</td>
                             <td style={{ padding: '0.85rem 1rem', fontWeight: 700, color: 'var(--accent)', whiteSpace: 'nowrap' }}>₦{order.total_amount?.toLocaleString()}</td>
                             <td style={{ padding: '0.85rem 1rem', whiteSpace: 'nowrap', color: 'var(--text-muted)', fontSize: '0.8rem' }}>{formatDate(order.created_at)}</td>
                             <td style={{ padding: '0.85rem 1rem' }}><StatusBadge status={order.status} /></td>
@@ -236,18 +244,19 @@ export default function Admin() {
                           <StatusBadge status={order.status} />
                         </div>
                         <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', fontSize: '0.8rem' }}>
-                          <div style={{ color: 'var(--text-muted)' }}>
-                            {(order.items || []).slice(0, 2).map((item, i) => (
-                              <span key={i}>{item.quantity}× {item.name}{i < Math.min(order.items.length, 2) - 1 ? ', ' : ''}</span>
-                            ))}
-                            {order.items?.length > 2 && <span> +{order.items.length - 2} more</span>}
-                          </div>
+                          <div style={{ color: 'var(--text-muted)' }}>{order.item_count} item{order.item_count === 1 ? '' : 's'}</div>
                           <div style={{ fontWeight: 800, color: 'var(--accent)', whiteSpace: 'nowrap', marginLeft: '0.5rem' }}>₦{order.total_amount?.toLocaleString()}</div>
                         </div>
                         <div style={{ fontSize: '0.7rem', color: '#94A3B8', marginTop: '0.5rem' }}>{formatDate(order.created_at)}</div>
                       </div>
                     ))}
                   </div>
+
+                  {nextCursor && (
+                    <div style={{ padding: '1rem', textAlign: 'center', borderTop: '1px solid #E5E7EB' }}>
+                      <button className="btn btn-outline" onClick={() => fetchOrders(nextCursor)}>Load more orders</button>
+                    </div>
+                  )}
                 </>
               )}
             </div>
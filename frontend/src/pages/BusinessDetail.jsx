@@ -20,14 +20,25 @@ export default function BusinessDetail({ onProductSynced }) {
   const [loading, setLoading] = useState(true);
   const [syncedResults, setSyncedResults] = useState([]);
 
+  const [loadingMore, setLoadingMore] = useState(false);
+
   useEffect(() => {
-    fetch(`${API_URL}/businesses`)
-      .then(r => r.json())
-      .then(data => setBusiness(data.find(b => b.slug === slug) || null))
+    fetch(`${API_URL}/businesses/${encodeURIComponent(slug)}?sort=featured&limit=24`)
+      .then(r => (r.ok ? r.json() : null))
+      .then(data => setBusiness(data))
       .catch(console.error)
       .finally(() => setLoading(false));
   }, [slug]);
 
+  const loadMoreProducts = () => {
+    setLoadingMore(true);
+    fetch(`${API_URL}/businesses/${encodeURIComponent(slug)}?sort=featured&limit=24&after=${business.next_cursor}`)
+      .then(r => r.json())
+      .then(data => setBusiness(prev => ({ ...prev, products: [...prev.products, ...data.products], next_cursor: data.next_cursor })))
+      .catch(console.error)
+      .finally(() => setLoadingMore(false));
+  };
+
   const handleManualSync = (product) => setSyncedResults(prev => [product, ...prev]);
   const handleAddToCart = (product) => {
     onProductSynced(product);
@@ -169,6 +180,11 @@ export default function BusinessDetail({ onProductSynced }) {
                   </div>
                 ))}
               </div>
+              {business.next_cursor && (
+                <button onClick={loadMoreProducts} disabled={loadingMore} className="btn btn-primary" style={{ width: '100%', marginTop: '1rem' }}>
+                  {loadingMore ? 'Loading...' : 'Load More Products'}
+                </button>
+              )}
             </div>
           </div>
 
@@ -180,7 +196,7 @@ export default function BusinessDetail({ onProductSynced }) {
                 <h3 style={{ marginBottom: '1.25rem', fontSize: '1rem', fontWeight: 700 }}>Store Info</h3>
                 <div style={{ display: 'flex', flexDirection: 'column', gap: '0.85rem', fontSize: '0.875rem' }}>
                   <div style={{ display: 'flex', alignItems: 'center', gap: '0.6rem' }}><Clock size={15} color="var(--accent)" /><span>Open 24/7</span></div>
-                  <div style={{ display: 'flex', alignItems: 'center', gap: '0.6rem' }}><Package size={15} color="var(--accent)" /><span>{business.products.length} Products Available</span></div>
+                  <div style={{ display: 'flex', alignItems: 'center', gap: '0.6rem' }}><Package size={15} color="var(--accent)" /><span>{business.product_count} Products Available</span></div>
                   <div style={{ display: 'flex', alignItems: 'center', gap: '0.6rem' }}><Zap size={15} color="#10B981" /><span style={{ color: '#10B981', fontWeight: 600 }}>Sync Verified</span></div>
                 </div>
               </div>
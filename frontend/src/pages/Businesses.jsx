@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { Search, MapPin, Star } from 'lucide-react';
-import { API_URL } from '../config';
+import { API_URL, fetchAllPages } from '../config';
 
 export default function Businesses() {
   const [businesses, setBusinesses] = useState([]);
@@ -11,22 +11,10 @@ export default function Businesses() {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const fetchWithTimeout = async (url, options = {}, timeout = 3000) => {
-          const controller = new AbortController();
-          const id = setTimeout(() => controller.abort(), timeout);
-          try {
-            const res = await fetch(url, { ...options, signal: controller.signal });
-            clearTimeout(id);
-            return res;
-          } catch (error) {
-            clearTimeout(id);
-            throw error;
-          }
-        };
-
-        const response = await fetchWithTimeout(`${API_URL}/businesses`);
-        if (!response.ok) throw new Error('Network response was not ok');
-        const data = await response.json();
+        const controller = new AbortController();
+        const id = setTimeout(() => controller.abort(), 3000);
+        const data = await fetchAllPages(`${API_URL}/businesses?fields=summary`, { signal: controller.signal })
+          .finally(() => clearTimeout(id));
         setBusinesses(data);
       } catch (err) {
         console.error("Failed to fetch businesses", err);
@@ -8,39 +8,40 @@ const CATEGORIES = ['All', 'Wellness', 'Beauty', 'Fashion', 'Electronics', 'Fitn
 export default function SearchPage({ onProductSynced }) {
   const [query, setQuery] = useState('');
   const [category, setCategory] = useState('All');
-  const [allData, setAllData] = useState([]);
+  const [results, setResults] = useState({ products: { results: [], total: 0 }, businesses: { results: [], total: 0 } });
   const [loading, setLoading] = useState(true);
   const [activeTab, setActiveTab] = useState('products'); // 'products' | 'businesses'
   const inputRef = useRef(null);
 
   useEffect(() => {
-    fetch(`${API_URL}/businesses`)
-      .then(r => r.json())
-      .then(data => setAllData(data))
-      .catch(console.error)
-      .finally(() => setLoading(false));
     inputRef.current?.focus();
   }, []);
 
   const q = query.trim().toLowerCase();
 
-  const filteredBusinesses = allData.filter(biz => {
-    const matchCat = category === 'All' || biz.category === category;
-    const matchQ = !q || biz.name.toLowerCase().includes(q) || biz.category?.toLowerCase().includes(q) || biz.description?.toLowerCase().includes(q);
-    return matchCat && matchQ;
-  });
+  // Results are ranked and paginated server-side by GET /search
+  useEffect(() => {
+    const controller = new AbortController();
+    const params = (type) => {
+      const p = new URLSearchParams({ q, type, limit: '60' });
+      if (category !== 'All') p.set('category', category);
+      return p;
+    };
+    const timer = setTimeout(() => {
+      Promise.all(['products', 'businesses'].map(type =>
+        fetch(`${API_URL}/search?${params(type)}`, { signal: controller.signal }).then(r => r.json())
+      ))
+        .then(([products, businesses]) => setResults({ products, businesses }))
+        .catch(err => { if (err.name !== 'AbortError') console.error(err); })
+        .finally(() => setLoading(false));
+    }, 150);
+    return () => { clearTimeout(timer); controller.abort(); };
+  }, [q, category]);
 
-  const filteredProducts = allData.flatMap(biz =>
-    biz.products
-      .filter(p => {
-        const matchCat = category === 'All' || biz.category === category;
-        const matchQ = !q || p.name.toLowerCase().includes(q) || p.description?.toLowerCase().includes(q) || biz.name.toLowerCase().includes(q);
-        return matchCat && matchQ;
-      })
-      .map(p => ({ ...p, business_name: biz.name, business_slug: biz.slug, business_category: biz.category }))
-  );
+  const filteredBusinesses = results.businesses.results;
+  const filteredProducts = results.products.results;
 
-  const totalResults = filteredProducts.length + filteredBusinesses.length;
+  const totalResults = results.products.total + results.businesses.total;
 
   return (
     <div style={{ minHeight: '100vh', background: 'var(--bg-main)' }}>
@@ -105,8 +106,8 @@ export default function SearchPage({ onProductSynced }) {
               </p>
               <div style={{ display: 'flex', gap: '0.5rem' }}>
                 {[
-                  { key: 'products', label: `Products (${filteredProducts.length})`, icon: <ShoppingBag size={15} /> },
-                  { key: 'businesses', label: `Stores (${filteredBusinesses.length})`, icon: <Store size={15} /> },
+                  { key: 'products', label: `Products (${results.products.total})`, icon: <ShoppingBag size={15} /> },
+                  { key: 'businesses', label: `Stores (${results.businesses.total})`, icon: <Store size={15} /> },
                 ].map(tab => (
                   <button key={tab.key} onClick={() => setActiveTab(tab.key)} style={{
                     padding: '0.4rem 0.9rem', borderRadius: 'var(--radius-full)',
@@ -174,7 +175,7 @@ export default function SearchPage({ onProductSynced }) {
                           </div>
                           <p style={{ color: 'var(--text-muted)', fontSize: '0.8rem', marginBottom: '0.75rem', display: '-webkit-box', WebkitLineClamp: 2, WebkitBoxOrient: 'vertical', overflow: 'hidden' }}>{biz.description}</p>
                           <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center' }}>
-                            <span style={{ fontSize: '0.75rem', color: 'var(--text-muted)' }}>{biz.products.length} products</span>
+                            <span style={{ fontSize: '0.75rem', color: 'var(--text-muted)' }}>{biz.product_count} products</span>
                             <span style={{ color: 'var(--accent)', fontSize: '0.8rem', fontWeight: 700, display: 'flex', alignItems: 'center', gap: '0.25rem' }}>
                               View Store <ArrowRight size={13} />
                             </span>